@@ -0,0 +1,67 @@
+import socket
+import network
+import uasyncio as asyncio
+from RokCommon.variables.vars_store import get_config_value
+
+# Variables
+# UDP port the relay listens on for beacons
+BEACON_PORT = 47800
+# Seconds between beacons
+BEACON_INTERVAL_S = 3
+# Protocol marker/version, first field of every beacon
+BEACON_MAGIC = "ROK1"
+BROADCAST_ADDR = "255.255.255.255"
+# lwIP value, used if the port doesn't export SO_BROADCAST
+SO_BROADCAST = getattr(socket, "SO_BROADCAST", 0x20)
+
+
+# ---------------------------------------------------------
+# Build a beacon datagram: ROK1|tag|type|project|busy|ip|stream_port
+# stream_port is 0 for devices without a camera stream
+# ---------------------------------------------------------
+def build_beacon(ip, busy=False):
+    project = get_config_value("projectType", "unknown")
+    stream_port = get_config_value("cam_stream_port", 8081) if project == "vision" else 0
+    fields = (
+        BEACON_MAGIC,
+        get_config_value("vehicleTag", "RokDevice"),
+        get_config_value("vehicleType", "Unknown"),
+        project,
+        "1" if busy else "0",
+        ip,
+        str(stream_port),
+    )
+    return "|".join(fields).encode()
+
+
+# ---------------------------------------------------------
+# Return the STA IP address, or None when not connected to a network
+# Beacons are not sent in AP mode since no relay can be listening there
+# ---------------------------------------------------------
+def _sta_ip():
+    sta = network.WLAN(network.STA_IF)
+    if sta.active() and sta.isconnected():
+        return sta.ifconfig()[0]
+    return None
+
+
+# ---------------------------------------------------------
+# Async task: broadcast a beacon every BEACON_INTERVAL_S seconds
+# busy_callback is an optional function returning True while a client is in control
+# ---------------------------------------------------------
+async def run_beacon(busy_callback=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, SO_BROADCAST, 1)
+        addr = socket.getaddrinfo(BROADCAST_ADDR, BEACON_PORT)[0][-1]
+        while True:
+            ip = _sta_ip()
+            if ip:
+                try:
+                    busy = bool(busy_callback()) if busy_callback else False
+                    sock.sendto(build_beacon(ip, busy), addr)
+                except Exception as e:
+                    print(f"Beacon send failed: {e}")
+            await asyncio.sleep(BEACON_INTERVAL_S)
+    finally:
+        sock.close()
@@ -1,6 +1,7 @@
 import network
 import time
 import ubinascii
+import uasyncio as asyncio
 from RokCommon.variables.vars_store import get_config_value, save_config_value
 
 # Variables
@@ -11,6 +12,24 @@ reboot_time_window = 20
 reboot_threshold = 3
 # Default AP password
 default_ap_password = "1234567890"
+# Association attempts, and how long each may take
+connect_attempts = 5
+connect_timeout_ms = 6000
+# How often the link status is checked while associating
+connect_poll_ms = 100
+# Pause before retrying an attempt that failed outright (bad password, no AP)
+connect_retry_s = 3
+
+# Set once Wi-Fi is up (connected, AP fallback or given up); services that
+# need the network wait on this instead of sleeping
+wifi_ready = asyncio.Event()
+
+# Link states that end an association attempt early (not all ports have all)
+_failed_states = tuple(
+    getattr(network, name)
+    for name in ("STAT_WRONG_PASSWORD", "STAT_NO_AP_FOUND", "STAT_CONNECT_FAIL")
+    if hasattr(network, name)
+)
 
 
 # ---------------------------------------------------------
@@ -37,6 +56,21 @@ def start_ap_mode(tag):
 # Falls back to AP mode if the connection fails, or multiple reboots are detected (while in STA mode)
 # ---------------------------------------------------------
 def connect_to_wifi():
+    return asyncio.run(connect_to_wifi_async())
+
+
+# ---------------------------------------------------------
+# connect_to_wifi() for the event loop: the radio associates while other boot
+# tasks (web server, precaching) run. Sets wifi_ready when done either way.
+# ---------------------------------------------------------
+async def connect_to_wifi_async():
+    try:
+        return await _connect()
+    finally:
+        wifi_ready.set()
+
+
+async def _connect():
     ssid = get_config_value("ssid")
     password = get_config_value("wifipass")
     ip_mode = get_config_value("ip_mode", "dhcp")
@@ -59,21 +93,19 @@ def connect_to_wifi():
         return start_ap_mode(tag)
 
     # Continue to STA mode to connect to configured network.
-    # HARD RESET BOTH INTERFACES
+    # HARD RESET BOTH INTERFACES, when a soft reboot left them running;
+    # after a hard reset they are already off and need no settling time
     sta = network.WLAN(network.STA_IF)
     ap = network.WLAN(network.AP_IF)
-    ap.active(False)
-    sta.active(False)
-    time.sleep_ms(300)
-
-    # Sometimes S3 needs two resets
-    ap.active(False)
-    sta.active(False)
-    time.sleep_ms(300)
-
-    # Activate STA mode only
+    if sta.active() or ap.active():
+        # Sometimes S3 needs two resets
+        for _ in range(2):
+            ap.active(False)
+            sta.active(False)
+            await asyncio.sleep_ms(300)
+
+    # Activate STA mode only (returns once the radio is up)
     sta.active(True)
-    time.sleep_ms(200)
 
     # disable power save mode on STA (prevents internal error on S3)
     try:
@@ -100,32 +132,37 @@ def connect_to_wifi():
         except Exception as e:
             print("Failed to set static IP:", e)
 
-    # Connect to the AP, retrying up to 5 times
-    for attempt in range(5):
-        print(f"Attempt {attempt+1}/5 connecting to {ssid}...")
+    # Connect to the AP, retrying up to connect_attempts times
+    wifierror = "Unknown Error occurred"
+    for attempt in range(connect_attempts):
+        print(f"Attempt {attempt+1}/{connect_attempts} connecting to {ssid}...")
 
         try:
             sta.connect(ssid, password)
         except Exception as e:
             print("STA connect() threw:", e)
             wifierror = e
-            time.sleep(3)
+            await asyncio.sleep(connect_retry_s)
             continue
 
-        # Check if the connection was successful
-        for _ in range(20):  # 6 seconds max
+        # Watch the link until it is up, fails, or the attempt times out
+        deadline = time.ticks_add(time.ticks_ms(), connect_timeout_ms)
+        while time.ticks_diff(deadline, time.ticks_ms()) > 0:
             if sta.isconnected():
                 print("Connected!", sta.ifconfig())
                 save_config_value("wifi_error", False)
                 return sta
-
-            time.sleep(0.3)
-
-    print("Failed to connect after 5 attempts.")
+            status = sta.status()
+            if status in _failed_states:
+                wifierror = f"Connection failed (status {status})"
+                print(wifierror)
+                await asyncio.sleep(connect_retry_s)
+                break
+            await asyncio.sleep_ms(connect_poll_ms)
+
+    print(f"Failed to connect after {connect_attempts} attempts.")
     save_config_value("wifi_error", True)
-    save_config_value(
-        "wifi_error_text", locals().get("wifierror", "Unknown Error occurred")
-    )
+    save_config_value("wifi_error_text", str(wifierror))
     return None
 
 
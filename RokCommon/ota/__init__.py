@@ -0,0 +1,10 @@
+# OTA update components
+
+# Modules only the OTA page uses; unloaded with it (see LazyRoute). Not
+# ota_transaction, which boot.py keeps loaded for recovery.
+OTA_PAGE_MODULES = (
+    "RokCommon.ota.ota_utils",
+    "RokCommon.ota.ota_bundle",
+    "RokCommon.ota.github_fetch",
+    "urequests",
+)
@@ -0,0 +1,264 @@
+"""
+Async GitHub Downloader for RokCommon OTA
+
+Fetches many files from raw.githubusercontent.com without paying a TLS
+handshake per file:
+- A small window of persistent HTTPS connections (HTTP/1.1 keep-alive), each
+  working through a shared queue of files
+- Bodies streamed to flash through one buffer per connection, with the git
+  blob SHA-1 and size checked before the file is committed
+- Retries with exponential backoff; a dropped connection is reopened
+- Per-file progress in GitHubFetcher.progress (and an optional callback)
+
+Imported by ota_utils only when an async sync runs, so the TLS buffers and
+this code stay off the heap otherwise.
+"""
+
+import gc
+import ubinascii
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from .ota_utils import blob_hasher, open_upload, commit_upload, delete_file
+
+RAW_HOST = "raw.githubusercontent.com"
+
+# Each TLS session costs tens of KB of heap on the ESP32; a worker whose
+# connection can't be opened hands its file back to the others
+MAX_CONNECTIONS = 2
+MAX_ATTEMPTS = 3
+RETRY_DELAY_MS = 500  # Doubled after each failed attempt
+READ_TIMEOUT = 15  # Seconds without data before a connection is dropped
+CHUNK_SIZE = 1024
+
+
+class FetchError(Exception):
+    """A download failed in a way retrying won't fix (e.g. HTTP 404)"""
+
+
+class _Connection:
+    """One keep-alive HTTPS connection to RAW_HOST"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.opened = False  # Ever connected
+        self.buf = bytearray(CHUNK_SIZE)
+        self.mv = memoryview(self.buf)
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(RAW_HOST, 443, ssl=True), READ_TIMEOUT
+        )
+        self._readinto = getattr(self.reader, "readinto", None)
+        self.opened = True
+
+    async def close(self):
+        if self.writer:
+            try:
+                self.writer.close()
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+        gc.collect()
+
+    async def _line(self):
+        line = await asyncio.wait_for(self.reader.readline(), READ_TIMEOUT)
+        if not line:
+            raise OSError("Connection closed")
+        return str(line, "utf-8").strip()
+
+    async def _read(self, n):
+        # Up to n bytes into self.buf -> count
+        if self._readinto:
+            got = await asyncio.wait_for(self._readinto(self.mv[:n]), READ_TIMEOUT)
+        else:
+            chunk = await asyncio.wait_for(self.reader.read(n), READ_TIMEOUT)
+            got = len(chunk)
+            self.mv[:got] = chunk
+        if not got:
+            raise OSError("Connection closed")
+        return got
+
+    async def _read_body(self, length, write):
+        while length:
+            n = await self._read(min(length, CHUNK_SIZE))
+            write(self.mv[:n])
+            length -= n
+
+    async def get(self, path, write):
+        """GET path, streaming the body to write(memoryview) -> byte count.
+        The connection is left ready for the next request."""
+        if not self.writer:
+            await self.open()
+        self.writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {RAW_HOST}\r\n"
+            "User-Agent: RokOTA\r\nConnection: keep-alive\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+
+        status = await self._line()
+        parts = status.split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise OSError(f"Bad status line: {status}")
+        code = int(parts[1])
+        length = None
+        chunked = False
+        keep_alive = parts[0] == "HTTP/1.1"
+        while True:
+            line = await self._line()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            value = value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding":
+                chunked = "chunked" in value
+            elif name == "connection":
+                keep_alive = value == "keep-alive"
+
+        received = 0
+
+        def counted(mv):
+            nonlocal received
+            received += len(mv)
+            if code == 200:
+                write(mv)  # Error bodies are only drained, to reuse the connection
+
+        if chunked:
+            while True:
+                size = int((await self._line()).split(";")[0], 16)
+                if not size:
+                    while await self._line():
+                        pass  # Trailers
+                    break
+                await self._read_body(size, counted)
+                await self._line()
+        elif length is not None:
+            await self._read_body(length, counted)
+        else:
+            keep_alive = False  # Body runs to close
+            try:
+                while True:
+                    counted(self.mv[: await self._read(CHUNK_SIZE)])
+            except OSError:
+                pass
+
+        if not keep_alive:
+            await self.close()
+        if code != 200:
+            if code == 404:
+                raise FetchError("HTTP 404")
+            raise OSError(f"HTTP {code}")
+        return received
+
+
+class GitHubFetcher:
+    """
+    Download a list of files from one repo/branch
+
+    Usage:
+        fetcher = GitHubFetcher(repo, branch)
+        failed = await fetcher.download(files, dest)
+    where files are get_github_file_list() entries and dest(path) gives the
+    local path each file is written to.
+    """
+
+    def __init__(self, repo, branch, connections=MAX_CONNECTIONS, on_progress=None):
+        self.repo = repo
+        self.branch = branch
+        self.connections = connections
+        self.on_progress = on_progress  # on_progress(path, received, size)
+        self.progress = {}  # path -> [received, size]
+        self._workers = 0
+
+    async def download(self, files, dest):
+        """Fetch every file -> {path: error message} for those that failed"""
+        queue = list(files)
+        failed = {}
+        workers = min(self.connections, len(queue))
+        self._workers = workers
+        await asyncio.gather(
+            *[self._worker(queue, dest, failed) for _ in range(workers)]
+        )
+        # Every worker gave up on its connection: report what was left
+        for file_info in queue:
+            failed[file_info["path"]] = "No connection"
+        return failed
+
+    async def _worker(self, queue, dest, failed):
+        conn = _Connection()
+        try:
+            while queue:
+                file_info = queue.pop(0)
+                path = file_info["path"]
+                delay = RETRY_DELAY_MS
+                for attempt in range(1, MAX_ATTEMPTS + 1):
+                    try:
+                        received = await self._fetch(conn, file_info, dest(path))
+                        print(f"✓ Staged: {path} ({received} bytes)")
+                        break
+                    except FetchError as e:
+                        failed[path] = str(e)
+                        break
+                    except Exception as e:
+                        await conn.close()
+                        if not conn.opened and self._workers > 1:
+                            # Probably no heap for another TLS session: leave
+                            # this file to the other connections
+                            queue.append(file_info)
+                            self.progress.pop(path, None)
+                            print(f"No extra download connection: {e}")
+                            return
+                        if attempt == MAX_ATTEMPTS:
+                            failed[path] = str(e)
+                            break
+                        print(f"Retrying {path} in {delay} ms ({e})")
+                        await asyncio.sleep(delay / 1000)
+                        delay *= 2
+                gc.collect()
+        finally:
+            self._workers -= 1
+            await conn.close()
+
+    async def _fetch(self, conn, file_info, local_path):
+        # One attempt: stream into a temp file, verify, then move into place
+        path = file_info["path"]
+        size = file_info["size"]
+        sha = file_info["sha"]
+        progress = self.progress[path] = [0, size]
+        h = blob_hasher(size) if sha else None
+        f, tmp_path = open_upload(local_path)
+
+        def write(mv):
+            f.write(mv)
+            if h:
+                h.update(mv)
+            progress[0] += len(mv)
+            if self.on_progress:
+                self.on_progress(path, progress[0], size)
+
+        try:
+            received = await conn.get(
+                f"/{self.repo}/{self.branch}/{file_info['github_path']}", write
+            )
+            f.close()
+            f = None
+            if received != size:
+                raise OSError(f"Truncated: {received}/{size} bytes")
+            if h and ubinascii.hexlify(h.digest()).decode() != sha:
+                raise OSError("SHA mismatch")
+            commit_upload(tmp_path)
+            tmp_path = None
+            return received
+        finally:
+            if f:
+                f.close()
+            if tmp_path:
+                delete_file(tmp_path)  # Never leave a partial download behind
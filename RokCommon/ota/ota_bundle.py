@@ -0,0 +1,185 @@
+"""
+OTA Bundle Unpacker for RokCommon
+
+A bundle (.rkb, built by tools/build_bundle.py) carries a whole deployment
+in one upload:
+
+    b"RKB1" | index length (u32 LE) | index JSON | file data, in index order
+
+The index is a list of {"path", "size", "stored", "sha256"[, "deflate"]}:
+size and sha256 describe the file as installed, stored is its byte count in
+the bundle (raw deflate when "deflate" is set).
+
+BundleUnpacker is fed the upload as it arrives (e.g. as the write callback
+of MultipartReader.read_part) and writes every file into an OTATransaction
+in one pass. Compressed files are inflated from their staged copy when
+complete, so RAM use stays at one buffer whatever the file sizes.
+"""
+
+import hashlib
+import ubinascii
+import ujson as json
+
+try:
+    import deflate
+
+    def _inflater(f):
+        return deflate.DeflateIO(f, deflate.RAW)
+
+except ImportError:
+    import zlib  # MicroPython before 1.21
+
+    def _inflater(f):
+        return zlib.DecompIO(f, -15)
+
+
+from .ota_utils import safe_upload_path, delete_file
+
+BUNDLE_MAGIC = b"RKB1"
+BUNDLE_EXT = ".rkb"
+MAX_INDEX_SIZE = 16 * 1024
+INFLATE_CHUNK_SIZE = 1024
+
+
+class BundleError(Exception):
+    """Malformed, truncated or corrupt bundle"""
+
+
+class BundleUnpacker:
+    """
+    Stage the files of a bundle as its bytes arrive
+
+    Usage:
+        unpacker = BundleUnpacker(txn)
+        await parser.read_part(unpacker.write)
+        files = unpacker.finish()   # raises BundleError; then txn.commit()
+    """
+
+    def __init__(self, txn):
+        self.txn = txn
+        self.files = []  # Paths staged and verified
+        self._head = bytearray()  # Magic + index length, then the index
+        self._index_len = None
+        self._index = None
+        self._entry = None
+        self._left = 0  # Stored bytes of the current file still to come
+        self._f = None
+        self._hash = None
+
+    def write(self, mv):
+        """Consume the next piece of the bundle"""
+        pos = 0
+        n = len(mv)
+        while pos < n:
+            if self._index is None:
+                pos = self._read_header(mv, pos)
+                continue
+            if self._entry is None:
+                self._next_file()
+                if self._entry is None:
+                    raise BundleError("Data after the last file")
+                continue
+            take = min(self._left, n - pos)
+            chunk = mv[pos : pos + take]
+            self._f.write(chunk)
+            if self._hash:
+                self._hash.update(chunk)
+            self._left -= take
+            pos += take
+            if not self._left:
+                self._end_file()
+
+    def finish(self):
+        """Check the whole bundle arrived -> list of staged paths"""
+        if self._index is None:
+            raise BundleError("Not a bundle")
+        if self._entry is None and self._index:
+            self._next_file()  # Trailing empty files
+        if self._entry is not None or self._index:
+            self.abort()
+            raise BundleError("Bundle truncated")
+        return self.files
+
+    def abort(self):
+        if self._f:
+            self._f.close()
+            self._f = None
+
+    def _read_header(self, mv, pos):
+        # Magic and index length first, then the index itself
+        head = self._head
+        need = 8 if self._index_len is None else 8 + self._index_len
+        take = min(need - len(head), len(mv) - pos)
+        head.extend(mv[pos : pos + take])
+        pos += take
+        if len(head) < need:
+            return pos
+        if self._index_len is None:
+            if bytes(head[:4]) != BUNDLE_MAGIC:
+                raise BundleError("Not a bundle")
+            self._index_len = int.from_bytes(head[4:8], "little")
+            if not 0 < self._index_len <= MAX_INDEX_SIZE:
+                raise BundleError("Bad bundle index size")
+        else:
+            self._index = json.loads(str(head[8:], "utf-8"))
+            self._head = None
+            print(f"Bundle: {len(self._index)} files")
+        return pos
+
+    def _next_file(self):
+        # Open the next entry; empty files are completed at once
+        while self._index:
+            entry = self._index.pop(0)
+            path = safe_upload_path(entry["path"])
+            if not path:
+                raise BundleError("Bad path in bundle")
+            entry["path"] = path
+            staged = self.txn.staged_path(path)
+            if entry.get("deflate"):
+                staged += ".z"  # Inflated into place once complete
+                self._hash = None
+            else:
+                self._hash = hashlib.sha256()
+            self._entry = entry
+            self._left = entry["stored"]
+            self._f = open(staged, "wb")
+            if self._left:
+                return
+            self._end_file()
+
+    def _end_file(self):
+        entry = self._entry
+        path = entry["path"]
+        self._f.close()
+        self._f = None
+        self._entry = None
+        if entry.get("deflate"):
+            digest, size = _inflate(self.txn.staged_path(path))
+        else:
+            digest, size = self._hash.digest(), entry["stored"]
+        if size != entry["size"]:
+            raise BundleError(f"{path}: size {size}, expected {entry['size']}")
+        if ubinascii.hexlify(digest).decode() != entry["sha256"]:
+            raise BundleError(f"{path}: SHA-256 mismatch")
+        self.files.append(path)
+
+
+def _inflate(staged):
+    # staged + ".z" -> staged -> (sha256 digest, size)
+    h = hashlib.sha256()
+    buf = bytearray(INFLATE_CHUNK_SIZE)
+    mv = memoryview(buf)
+    size = 0
+    try:
+        with open(staged + ".z", "rb") as src, open(staged, "wb") as dst:
+            stream = _inflater(src)
+            while True:
+                n = stream.readinto(buf)
+                if not n:
+                    break
+                dst.write(mv[:n])
+                h.update(mv[:n])
+                size += n
+    finally:
+        delete_file(staged + ".z")
+    return h.digest(), size
@@ -2,7 +2,7 @@
 Generic OTA (Over-The-Air) update page for RokCommon
 
 Provides web UI for:
-- Uploading complete project folders
+- Uploading complete project folders, or one bundle (.rkb) of a deployment
 - Downloading updates from GitHub
 - Device restart functionality
 
@@ -12,6 +12,10 @@ Updated to use unified Request/Response system
 from RokCommon.variables.vars_store import get_config_value
 from RokCommon.web import Request, Response, PageHandler
 from RokCommon.web.pages.home_page import load_and_process_header
+from RokCommon.web.template import Template, get_template, render_cached
+from RokCommon.web.static_assets import clear_template_cache
+from RokCommon.web.multipart import MultipartReader, parse_boundary, parse_disposition
+from RokCommon.ota.ota_bundle import BundleUnpacker, BUNDLE_EXT
 import RokCommon.ota.ota_utils as ota
 import os
 import gc
@@ -37,7 +41,8 @@ class OTAPageHandler(PageHandler):
         """Handle POST requests for OTA page"""
         try:
             if request.is_multipart():
-                return self.handle_file_upload(request)
+                # The HTTP engine streams multipart bodies to handle_upload()
+                return Response.json_error("Upload body was not streamed")
             else:
                 return self.handle_form_post(request)
         except Exception as e:
@@ -46,83 +51,118 @@ class OTAPageHandler(PageHandler):
                 f"Error: {e}", status="500 Internal Server Error"
             )
 
-    def handle_file_upload(self, request):
-        """Handle multipart file upload"""
+    async def handle_upload(self, request, reader):
+        """
+        Handle a multipart POST straight off the socket
+
+        Files are written to flash chunk by chunk into the OTA staging area
+        and installed together in one commit once the whole body has arrived;
+        a failed upload installs nothing. A .rkb bundle is unpacked into
+        staging in the same pass. Form fields are collected;
+        a post without files (the page's FormData actions) is handled like a
+        regular form post.
+        """
+        boundary = parse_boundary(request.content_type)
+        if not boundary:
+            return Response.json_error("Missing multipart boundary")
+
+        parser = MultipartReader(reader, boundary, request.body_pending)
+        uploaded_files = []
+        folder_name = ""
+        next_report = 0
+        f = None
+        txn = None  # Created by the first file, so form-only posts stage nothing
         try:
-            # Parse multipart form data
-            boundary = request.content_type.split("boundary=")[1]
-            parts = request.body.encode().split(f"--{boundary}".encode())
-
-            uploaded_files = []
-            folder_name = ""
-
-            for part in parts:
-                if b"Content-Disposition: form-data" in part:
-                    lines = part.split(b"\r\n")
-
-                    # Find the Content-Disposition line
-                    for i, line in enumerate(lines):
-                        if b"Content-Disposition: form-data" in line:
-                            line_str = line.decode("utf-8")
-
-                            # Extract filename
-                            if "filename=" in line_str:
-                                filename_start = line_str.find('filename="') + 10
-                                filename_end = line_str.find('"', filename_start)
-                                filename = line_str[filename_start:filename_end]
-
-                                # Skip empty files
-                                if not filename:
-                                    continue
-
-                                # Extract folder name from first file if not set
-                                if not folder_name and "/" in filename:
-                                    folder_name = filename.split("/")[0]
-
-                                # Remove folder prefix for local storage
-                                if folder_name and filename.startswith(
-                                    folder_name + "/"
-                                ):
-                                    local_filename = filename[len(folder_name) + 1 :]
-                                else:
-                                    local_filename = filename
-
-                                # Find the start of file content (after double CRLF)
-                                content_start = -1
-                                for j in range(i + 1, len(lines)):
-                                    if lines[j] == b"":
-                                        content_start = j + 1
-                                        break
-
-                                if content_start != -1:
-                                    # Get file content (all remaining lines except the last empty one)
-                                    file_content = b"\r\n".join(lines[content_start:-1])
-
-                                    # Save the file
-                                    success, msg = ota.save_uploaded_file(
-                                        local_filename, file_content
-                                    )
-                                    if success:
-                                        uploaded_files.append(local_filename)
-                                        print(f"Uploaded: {local_filename}")
-                                    else:
-                                        print(
-                                            f"Failed to upload {local_filename}: {msg}"
-                                        )
-
-            if uploaded_files:
-                return Response.json_success(
-                    f"Successfully uploaded {len(uploaded_files)} files",
-                    files=uploaded_files,
+            while True:
+                headers = await parser.next_part()
+                request.body_pending = parser.remaining
+                if headers is None:
+                    break
+                name, filename = parse_disposition(
+                    headers.get("content-disposition", "")
                 )
-            else:
-                return Response.json_error("No files were uploaded")
+                if filename is None:
+                    request.form[name] = await parser.read_value()
+                    continue
+                # Skip empty file inputs
+                if not filename:
+                    continue
+
+                # Extract folder name from first file if not set
+                if not folder_name and "/" in filename:
+                    folder_name = filename.split("/")[0]
+
+                # Remove folder prefix for local storage
+                if folder_name and filename.startswith(folder_name + "/"):
+                    local_filename = filename[len(folder_name) + 1 :]
+                else:
+                    local_filename = filename
+
+                # Staged now, installed with the other files once all arrived
+                if txn is None:
+                    txn = ota.OTATransaction()
+                if filename.endswith(BUNDLE_EXT):
+                    # A whole deployment: unpacked into staging as it arrives
+                    unpacker = BundleUnpacker(txn)
+                    try:
+                        size = await parser.read_part(unpacker.write)
+                        files = unpacker.finish()
+                    finally:
+                        unpacker.abort()
+                    uploaded_files.extend(files)
+                    print(f"Unpacked: {filename} ({size} bytes, {len(files)} files)")
+                else:
+                    local_filename = ota.safe_upload_path(local_filename)
+                    f = txn.open(local_filename)
+                    size = await parser.read_part(f.write)
+                    f.close()
+                    f = None
+                    uploaded_files.append(local_filename)
+                    print(f"Uploaded: {local_filename} ({size} bytes)")
+
+                # Progress, every ~10% of the request body
+                if parser.received >= next_report:
+                    percent = parser.received * 100 // parser.total
+                    print(
+                        f"Upload progress: {percent}% "
+                        f"({parser.received}/{parser.total} bytes)"
+                    )
+                    next_report = parser.received + parser.total // 10
+                gc.collect()
+
+            await parser.finish()
+            request.body_pending = 0
+            if txn:
+                txn.commit()
+                clear_template_cache()  # Assets and their hashes may have changed
+                ota.forget_installed(uploaded_files)  # Rehashed by the next sync
 
         except Exception as e:
             print(f"File upload error: {e}")
+            if f:
+                f.close()
+            request.body_pending = parser.remaining
+            if isinstance(e, ota.TransactionBusy):
+                return Response.json_error(str(e), status="409 Conflict")
             return Response.json_error(
                 f"Upload failed: {str(e)}", status="500 Internal Server Error"
             )
+        finally:
+            if txn:
+                txn.abort()  # Nothing from a failed upload is installed
+
+        if uploaded_files:
+            return Response.json_success(
+                f"Successfully uploaded {len(uploaded_files)} files",
+                files=uploaded_files,
+            )
+        action = request.form.get("action", "upload")
+        if action == "github_download":
+            # In the event loop, so the parallel downloader can be used
+            return await self.handle_github_download_async(request)
+        if action != "upload":
+            return self.handle_form_post(request)
+        return Response.json_error("No files were uploaded")
 
     def handle_form_post(self, request):
         """Handle regular form POST requests"""
@@ -146,27 +186,59 @@ class OTAPageHandler(PageHandler):
                 f"Form processing failed: {str(e)}", status="500 Internal Server Error"
             )
 
+    def _github_sync_args(self, request):
+        # Form fields -> sync_from_github() keyword arguments
+        repo = request.get_form("repo", ota.DEFAULT_GITHUB_REPO).strip()
+        # The page's field is "ref"
+        branch = request.get_form("branch") or request.get_form(
+            "ref", ota.DEFAULT_GITHUB_BRANCH
+        )
+        return {
+            "repo": repo,
+            "branch": branch.strip(),
+            "folder": request.get_form("folder", "").strip(),
+            # Only changed files unless a full sync is asked for
+            "full": request.get_form("full_sync") == "true",
+            "delete_removed": request.get_form("delete_removed") == "true",
+        }
+
+    def _github_sync_response(self, success, result):
+        if success:
+            clear_template_cache()  # Assets and their hashes may have changed
+            return Response.json_success(
+                f"Downloaded {len(result.get('downloaded', []))} files, "
+                f"{len(result.get('unchanged', []))} unchanged",
+                details=result,
+            )
+        return Response.json_error(result, status="500 Internal Server Error")
+
     def handle_github_download(self, request):
-        """Handle GitHub download request"""
+        """Handle GitHub download request (urlencoded posts; one file at a time)"""
         try:
-            repo = request.get_form("repo", ota.DEFAULT_GITHUB_REPO).strip()
-            branch = request.get_form("branch", ota.DEFAULT_GITHUB_BRANCH).strip()
-            folder = request.get_form("folder", "").strip()
-
-            if not repo:
+            args = self._github_sync_args(request)
+            if not args["repo"]:
                 return Response.json_error("Repository name is required")
+            return self._github_sync_response(*ota.sync_from_github(**args))
 
-            # Perform GitHub sync
-            success, result = ota.sync_from_github(repo, branch, folder)
+        except ota.TransactionBusy as e:
+            return Response.json_error(str(e), status="409 Conflict")
+        except Exception as e:
+            return Response.json_error(
+                f"GitHub download failed: {str(e)}", status="500 Internal Server Error"
+            )
 
-            if success:
-                return Response.json_success(
-                    f"Downloaded {len(result.get('downloaded', []))} files",
-                    details=result,
-                )
-            else:
-                return Response.json_error(result, status="500 Internal Server Error")
+    async def handle_github_download_async(self, request):
+        """Handle GitHub download request with parallel downloads"""
+        try:
+            args = self._github_sync_args(request)
+            if not args["repo"]:
+                return Response.json_error("Repository name is required")
+            return self._github_sync_response(
+                *await ota.sync_from_github_async(**args)
+            )
 
+        except ota.TransactionBusy as e:
+            return Response.json_error(str(e), status="409 Conflict")
         except Exception as e:
             return Response.json_error(
                 f"GitHub download failed: {str(e)}", status="500 Internal Server Error"
@@ -216,6 +288,7 @@ class OTAPageHandler(PageHandler):
             success = ota.restore_backup()
 
             if success:
+                clear_template_cache()
                 return Response.json_success("Backup restored successfully")
             else:
                 return Response.json_error(
@@ -255,33 +328,30 @@ def handle_post(body, content_type, query_string=None):
 # ---------------------------------------------------------
 # HTML page building
 # ---------------------------------------------------------
+def _render_ota_page():
+    # Load the unified OTA template from RokCommon
+    template = get_template("RokCommon/web/pages/assets/ota_page.html")
+    if template is None:
+        # Fallback - should not happen with proper deployment
+        print("Warning: Unified OTA template not found, using basic fallback")
+        template = Template(
+            "<!DOCTYPE html><html><head><title>OTA Updates</title></head><body><h1>OTA Updates</h1><p>Template not found</p></body></html>"
+        )
+
+    # Get configuration values
+    vehicle_name = get_config_value("vehicleName", "RokDevice")
+    project_type = get_config_value("projectType", "unknown")
+
+    return template.render(
+        {"header_nav": load_and_process_header(vehicle_name, project_type)}
+    )
+
+
 def build_ota_page():
     """Build the OTA page HTML using unified template with project-specific content"""
     try:
-        # Load the unified OTA template from RokCommon
-        template_path = "RokCommon/web/pages/assets/ota_page.html"
-
-        try:
-            with open(template_path, "r") as f:
-                html_template = f.read()
-        except:
-            # Fallback - should not happen with proper deployment
-            print("Warning: Unified OTA template not found, using basic fallback")
-            html_template = "<!DOCTYPE html><html><head><title>OTA Updates</title></head><body><h1>OTA Updates</h1><p>Template not found</p></body></html>"
-
-        # Get configuration values
-        vehicle_name = get_config_value("vehicleName", "RokDevice")
-        project_type = get_config_value("projectType", "unknown")
-
-        # Load and process header navigation
-        header_nav = load_and_process_header(vehicle_name, project_type)
-        if not header_nav:
-            header_nav = f"<div>Header not found for {vehicle_name}</div>"
-
-        # Simple template replacement - only header needed
-        html = html_template.replace("{{ header_nav }}", header_nav)
-
-        return html
+        # Only the header is filled in, so the page is cached until config changes
+        return render_cached("ota_page", _render_ota_page)
 
     except Exception as e:
         print(f"Error building OTA page: {e}")
@@ -0,0 +1,312 @@
+"""
+Transactional OTA updates for RokCommon
+
+Updates never write into the live tree. New files are staged (and verified)
+under ota_staging/, then swapped in by a commit that only renames:
+- The journal (ota_journal.json) lists every file before the first rename
+- Each replaced or deleted file is moved to ota_prev/ rather than removed
+- A commit cut off by a reset is finished at boot by recover(); if that
+  fails, or on request, rollback() restores ota_prev/
+
+Only one transaction can be open at a time: a second OTATransaction()
+raises TransactionBusy until the first commits or aborts.
+
+The risky window is a handful of renames, and the device keeps running the
+old files while an update downloads. A commit that replaces a .py file also
+deletes its precompiled copy under mpy/, and one that replaces a web asset
+deletes its .gz variant and the folder's hash manifest (unless the update
+ships new ones), so stale build outputs never shadow new sources. Only os and
+json are used so boot recovery works whatever state the rest of the tree is
+in.
+"""
+
+import os
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+STAGING_DIR = "ota_staging"
+PREVIOUS_DIR = "ota_prev"
+JOURNAL = "ota_journal.json"
+MPY_DIR = "mpy"  # Precompiled mirror of the tree (tools/build_mpy.py)
+# Asset folders with .gz variants and a hash manifest (tools/build_assets.py)
+ASSET_DIR = "web/pages/assets/"
+ASSET_MANIFEST = "asset_manifest.json"  # Rehashed on device when missing
+
+# The transaction currently staging; only one may be open at a time, since
+# each clears the staging area when it starts
+_active = None
+
+# Journal states
+STATE_COMMITTING = "committing"  # Renames in progress
+STATE_COMMITTED = "committed"  # Done; ota_prev/ holds the previous version
+
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def _make_dirs(path):
+    parts = path.split("/")
+    for i in range(1, len(parts) + 1):
+        d = "/".join(parts[:i])
+        if d and not _exists(d):
+            try:
+                os.mkdir(d)
+            except OSError:
+                pass
+
+
+def _parent(path):
+    return "/".join(path.split("/")[:-1])
+
+
+def _move(src, dst):
+    # Rename src over dst, creating dst's folder as needed
+    parent = _parent(dst)
+    if parent:
+        _make_dirs(parent)
+    try:
+        os.rename(src, dst)
+    except OSError:
+        # Filesystems that won't rename over an existing file
+        os.remove(dst)
+        os.rename(src, dst)
+
+
+def _remove_tree(path):
+    try:
+        entries = os.listdir(path)
+    except OSError:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return
+    for entry in entries:
+        _remove_tree(f"{path}/{entry}")
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def _write_journal(journal):
+    # Temp file + rename: the journal is always either old or new, never torn
+    tmp = JOURNAL + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(journal, f)
+    _move(tmp, JOURNAL)
+
+
+class TransactionBusy(Exception):
+    """Another update is already being staged"""
+
+
+def read_journal():
+    """Current journal, or None if no update has been committed"""
+    try:
+        with open(JOURNAL, "r") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+class OTATransaction:
+    """
+    One update: stage files, then commit them all at once
+
+    Usage:
+        txn = OTATransaction()
+        f = txn.open("web/pages/play_page.py")  # or write to txn.staged_path()
+        ...
+        txn.delete("old_module.py")
+        txn.commit()          # or txn.abort()
+    """
+
+    def __init__(self):
+        global _active
+        if _active is not None:
+            raise TransactionBusy("Another OTA update is in progress")
+        journal = read_journal()
+        if journal and journal.get("state") == STATE_COMMITTING:
+            raise OSError("Previous OTA commit unfinished; run recover() first")
+        # The last update stays undoable until this one commits
+        _remove_tree(STAGING_DIR)
+        _make_dirs(STAGING_DIR)
+        self.files = []
+        self.deletes = []
+        _active = self
+
+    def staged_path(self, path):
+        """Where to write the new version of path (its folder is created)"""
+        path = path.strip("/")
+        if path not in self.files:
+            self.files.append(path)
+        staged = f"{STAGING_DIR}/{path}"
+        parent = _parent(staged)
+        if parent:
+            _make_dirs(parent)
+        return staged
+
+    def open(self, path):
+        """Open the staged copy of path for writing (binary)"""
+        return open(self.staged_path(path), "wb")
+
+    def unstage(self, path):
+        """Drop a staged file (e.g. one that failed verification)"""
+        path = path.strip("/")
+        if path in self.files:
+            self.files.remove(path)
+        try:
+            os.remove(f"{STAGING_DIR}/{path}")
+        except OSError:
+            pass
+
+    def delete(self, path):
+        """Remove path from the live tree as part of the commit"""
+        path = path.strip("/")
+        if path not in self.deletes:
+            self.deletes.append(path)
+
+    def commit(self):
+        """Swap every staged file in and every deleted file out"""
+        if _active is not self:
+            raise OSError("OTA transaction already committed or aborted")
+        if not self.files and not self.deletes:
+            self.abort()
+            return
+        for path in self.files:
+            if not _exists(f"{STAGING_DIR}/{path}"):
+                self.abort()
+                raise OSError(f"Staged copy of {path} missing; nothing installed")
+        try:
+            self._commit()
+        finally:
+            self._release()
+
+    def _commit(self):
+        for path in self.files + self.deletes:
+            for derived in _derived_files(path):
+                if derived not in self.files and _exists(derived):
+                    self.delete(derived)
+        # ota_prev/ and the journal describe one update: drop both together
+        _clear_previous()
+        journal = {
+            "state": STATE_COMMITTING,
+            # [path, had a previous version] so rollback knows what to delete
+            "files": [[p, _exists(p)] for p in self.files],
+            "deletes": [p for p in self.deletes if _exists(p)],
+        }
+        _write_journal(journal)
+        _roll_forward(journal)
+        journal["state"] = STATE_COMMITTED
+        _write_journal(journal)
+        _remove_tree(STAGING_DIR)
+        print(f"OTA commit: {len(self.files)} updated, {len(self.deletes)} deleted")
+
+    def abort(self):
+        """Discard everything staged; the live tree was never touched. Does
+        nothing once the transaction has committed, so it is safe in finally"""
+        if _active is not self:
+            return
+        _remove_tree(STAGING_DIR)
+        self.files = []
+        self.deletes = []
+        self._release()
+
+    def _release(self):
+        global _active
+        if _active is self:
+            _active = None
+
+
+def _derived_files(path):
+    # Build outputs made from path, stale once it changes
+    if path.endswith(".py"):
+        return [f"{MPY_DIR}/{path[:-3]}.mpy"]
+    if ASSET_DIR in path and not (
+        path.endswith(".gz") or path.endswith(ASSET_MANIFEST)
+    ):
+        folder = path[: path.index(ASSET_DIR) + len(ASSET_DIR)]
+        return [path + ".gz", folder + ASSET_MANIFEST]
+    return []
+
+
+def _roll_forward(journal):
+    # Idempotent: safe to rerun from any point after a reset
+    for path, _existed in journal["files"]:
+        staged = f"{STAGING_DIR}/{path}"
+        if not _exists(staged):
+            continue  # Already moved in
+        if _exists(path):
+            _move(path, f"{PREVIOUS_DIR}/{path}")
+        _move(staged, path)
+    for path in journal["deletes"]:
+        if _exists(path):
+            _move(path, f"{PREVIOUS_DIR}/{path}")
+
+
+def _roll_back(journal):
+    for path, existed in journal["files"]:
+        previous = f"{PREVIOUS_DIR}/{path}"
+        if _exists(previous):
+            _move(previous, path)
+        elif not existed and _exists(path):
+            os.remove(path)  # Added by the update
+    for path in journal["deletes"]:
+        previous = f"{PREVIOUS_DIR}/{path}"
+        if _exists(previous):
+            _move(previous, path)
+
+
+def _clear_previous():
+    # Journal first: a reset in between must not leave it pointing at an
+    # emptied ota_prev/
+    try:
+        os.remove(JOURNAL)
+    except OSError:
+        pass
+    _remove_tree(PREVIOUS_DIR)
+
+
+def rollback():
+    """Restore the files replaced or deleted by the last update -> bool"""
+    journal = read_journal()
+    if not journal or journal.get("state") not in (
+        STATE_COMMITTING,
+        STATE_COMMITTED,
+    ):
+        return False
+    _roll_back(journal)
+    _remove_tree(STAGING_DIR)
+    _clear_previous()
+    print("OTA rollback complete")
+    return True
+
+
+def recover():
+    """
+    Call at boot: finish a commit that a reset interrupted, or roll it back
+    if it can't be finished. Does nothing when there is no pending commit.
+    """
+    journal = read_journal()
+    if not journal or journal.get("state") != STATE_COMMITTING:
+        _remove_tree(STAGING_DIR)  # Leftovers of an update never committed
+        return
+    print("OTA: resuming interrupted commit")
+    try:
+        _roll_forward(journal)
+        journal["state"] = STATE_COMMITTED
+        _write_journal(journal)
+        _remove_tree(STAGING_DIR)
+        print("OTA: commit finished")
+    except Exception as e:
+        print(f"OTA: commit could not be finished ({e}), rolling back")
+        rollback()
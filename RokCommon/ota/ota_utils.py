@@ -4,7 +4,8 @@ OTA (Over-The-Air) update utilities for RokCommon
 Features:
 - File upload and management
 - Backup system for current files
-- GitHub repository sync
+- GitHub repository sync, delta by default (only changed files are fetched)
+- Updates staged and committed as one transaction (see ota_transaction)
 - Safe file operations with rollback capability
 
 Generic implementation - works with any project via overlay deployment
@@ -13,6 +14,8 @@ Generic implementation - works with any project via overlay deployment
 import os
 import gc
 import machine
+import hashlib
+import ubinascii
 import ujson as json
 
 try:
@@ -20,14 +23,26 @@ try:
 except ImportError:
     import requests
 
+from .ota_transaction import OTATransaction, TransactionBusy, rollback, read_journal
+
 # Configuration for GitHub sync
 DEFAULT_GITHUB_REPO = "FirstNight1/Rokenbok-Wifi-Esp32"
 DEFAULT_GITHUB_BRANCH = "main"
 
+# Buffer used to stream downloads to flash
+DOWNLOAD_CHUNK_SIZE = 1024
+
+# "<repo>/<folder>" -> {installed file: git blob SHA-1}, as last synced
+OTA_MANIFEST = "ota_manifest.json"
+
 # Files to ignore during updates (preserve local configs)
 IGNORE_FILES = [
     "variables/config.json",  # Preserve local configuration
     "ota_backup.json",  # Preserve backup metadata
+    "ota_manifest.json",  # Installed-file manifest for delta sync
+    "ota_journal.json",  # Commit journal of the last update
+    "ota_staging",  # Update being staged
+    "ota_prev",  # Files replaced by the last update
     "boot.py.bak",  # Preserve backup files
     ".DS_Store",  # System files
     "__pycache__",  # Python cache
@@ -80,8 +95,12 @@ def backup_system():
 
 
 def restore_backup():
-    """Restore system from backup files"""
+    """Undo the last update, or restore the manual backup files if no update
+    has been committed since"""
     try:
+        if read_journal() and rollback():
+            return True
+
         with open("ota_backup.json", "r") as f:
             backup_meta = json.load(f)
 
@@ -221,25 +240,55 @@ def get_file_info(path):
 # ---------------------------------------------------------
 # File upload functionality
 # ---------------------------------------------------------
+def safe_upload_path(filename):
+    """Sanitize an uploaded filename - prevent directory traversal"""
+    filename = filename.replace("../", "").replace("..\\", "")
+    return filename.strip("/\\")
+
+
+def open_upload(filename):
+    """Open a temp file to stream an upload into -> (file, temp path).
+    Finish with commit_upload() so a cut-off upload never replaces a file."""
+    filename = safe_upload_path(filename)
+    dir_path = "/".join(filename.split("/")[:-1])
+    if dir_path:
+        make_dirs(dir_path)
+    tmp_path = filename + ".tmp"
+    return open(tmp_path, "wb"), tmp_path
+
+
+def commit_upload(tmp_path):
+    """Atomically move a completed upload over its target file"""
+    target = tmp_path[: -len(".tmp")]
+    replace_file(tmp_path, target)
+    return target
+
+
+def replace_file(src, dst):
+    """Rename src over dst"""
+    try:
+        os.rename(src, dst)
+    except OSError:
+        # Filesystems that won't rename over an existing file
+        delete_file(dst)
+        os.rename(src, dst)
+
+
 def save_uploaded_file(filename, content):
     """Save uploaded file content to filesystem"""
     try:
-        # Sanitize filename - prevent directory traversal
-        filename = filename.replace("../", "").replace("..\\", "")
-        filename = filename.strip("/\\")
+        filename = safe_upload_path(filename)
 
         # Create directory if needed
         dir_path = "/".join(filename.split("/")[:-1])
         if dir_path:
             make_dirs(dir_path)
 
-        # Save file
+        # Save file (always binary, so bytes land on flash unchanged)
         if isinstance(content, str):
-            with open(filename, "w") as f:
-                f.write(content)
-        else:
-            with open(filename, "wb") as f:
-                f.write(content)
+            content = content.encode()
+        with open(filename, "wb") as f:
+            f.write(content)
 
         print(f"File saved: {filename}")
         return True, f"File '{filename}' saved successfully"
@@ -253,23 +302,63 @@ def save_uploaded_file(filename, content):
 # ---------------------------------------------------------
 # GitHub integration
 # ---------------------------------------------------------
-def download_github_file(repo, branch, file_path):
-    """Download a single file from GitHub repository"""
+def download_github_file(repo, branch, file_path, local_path, size=None, sha=None):
+    """
+    Download a single file from GitHub repository straight to flash
+
+    The body is streamed through a fixed buffer into a temp file while its
+    git blob SHA-1 is computed; the temp file replaces local_path only if
+    the size and SHA match what the trees API reported. Memory use does not
+    depend on the file size, and binary files are written byte-exact.
+    """
     url = f"https://raw.githubusercontent.com/{repo}/{branch}/{file_path}"
+    response = None
+    f = None
+    tmp_path = None
 
     try:
         print(f"Downloading: {url}")
-        response = requests.get(url)
+        response = requests.get(url, stream=True)
 
-        if response.status_code == 200:
-            return True, response.text
-        else:
+        if response.status_code != 200:
             return False, f"HTTP {response.status_code}"
 
+        if size is None:
+            size = int(response.headers.get("Content-Length", -1))
+        h = blob_hasher(size) if sha else None
+
+        f, tmp_path = open_upload(local_path)
+        buf = bytearray(DOWNLOAD_CHUNK_SIZE)
+        mv = memoryview(buf)
+        received = 0
+        while size < 0 or received < size:
+            n = response.raw.readinto(buf)
+            if not n:
+                break
+            f.write(mv[:n])
+            if h:
+                h.update(mv[:n])
+            received += n
+        f.close()
+        f = None
+
+        if size >= 0 and received != size:
+            return False, f"Truncated: {received}/{size} bytes"
+        if h and ubinascii.hexlify(h.digest()).decode() != sha:
+            return False, "SHA mismatch"
+
+        commit_upload(tmp_path)
+        tmp_path = None
+        return True, f"{received} bytes"
+
     except Exception as e:
         return False, str(e)
     finally:
-        if "response" in locals():
+        if f:
+            f.close()
+        if tmp_path:
+            delete_file(tmp_path)  # Never leave a partial download behind
+        if response:
             response.close()
         gc.collect()
 
@@ -302,6 +391,7 @@ def get_github_file_list(repo, branch, folder=""):
                                 "path": local_path,
                                 "github_path": file_path,
                                 "size": item.get("size", 0),
+                                "sha": item.get("sha"),
                             }
                         )
                 else:
@@ -310,6 +400,7 @@ def get_github_file_list(repo, branch, folder=""):
                             "path": file_path,
                             "github_path": file_path,
                             "size": item.get("size", 0),
+                            "sha": item.get("sha"),
                         }
                     )
 
@@ -323,69 +414,292 @@ def get_github_file_list(repo, branch, folder=""):
         gc.collect()
 
 
-def sync_from_github(repo=None, branch=None, folder=None, dry_run=False):
-    """Sync from GitHub repository"""
-    if not repo:
-        repo = DEFAULT_GITHUB_REPO
-    if not branch:
-        branch = DEFAULT_GITHUB_BRANCH
-
-    results = {"downloaded": [], "failed": [], "skipped": []}
-
+# ---------------------------------------------------------
+# Delta sync: installed-file manifest of git blob SHAs
+# ---------------------------------------------------------
+def blob_hasher(size):
+    """sha1 object primed with the git blob header for a size-byte file"""
+    return hashlib.sha1(b"blob " + str(size).encode() + b"\0")
+
+
+def git_blob_sha(path):
+    """Git blob SHA-1 of a local file (what the GitHub trees API reports)"""
+    h = blob_hasher(os.stat(path)[6])
+    buf = bytearray(1024)
+    mv = memoryview(buf)
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(mv[:n])
+    return ubinascii.hexlify(h.digest()).decode()
+
+
+def load_manifest():
+    """Synced sources -> {installed file: blob SHA} ({} if none yet)"""
     try:
-        print(f"Starting GitHub sync from {repo}/{branch}/{folder or 'root'}")
-
-        # Get file list from GitHub
-        success, github_files = get_github_file_list(repo, branch, folder)
-        if not success:
-            return False, f"Failed to get GitHub file list: {github_files}"
-
-        print(f"Found {len(github_files)} files on GitHub")
+        with open(OTA_MANIFEST, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_manifest(manifest):
+    """Write the manifest through a temp file so it is never half-written"""
+    tmp_path = OTA_MANIFEST + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    replace_file(tmp_path, OTA_MANIFEST)
+
+
+def forget_installed(paths):
+    """Drop files from the manifest (e.g. replaced by an upload), so the next
+    delta sync hashes them instead of trusting their recorded SHA"""
+    manifest = load_manifest()
+    dropped = False
+    for installed in manifest.values():
+        for path in paths:
+            if installed.pop(path, None) is not None:
+                dropped = True
+    if dropped:
+        save_manifest(manifest)
+
+
+def _is_current(file_info, installed):
+    # Local file matches the remote blob? The recorded SHA is trusted when
+    # the size matches, so a local edit that keeps the size goes unnoticed
+    # (full=True catches it). Uploads call forget_installed() to avoid that.
+    path = file_info["path"]
+    try:
+        size = os.stat(path)[6]
+    except OSError:
+        return False
+    if size != file_info["size"] or not file_info["sha"]:
+        return False
+    if installed.get(path) == file_info["sha"]:
+        return True
+    # Not in the manifest (first delta sync): hash the local copy once
+    try:
+        return git_blob_sha(path) == file_info["sha"]
+    except Exception:
+        return False
 
-        if dry_run:
-            return True, {"dry_run": True, "would_download": github_files}
 
-        # Create backup before sync
-        backup_success, backup_info = backup_system()
-        if not backup_success:
-            print(f"Backup warning: {backup_info}")
+def _plan_sync(repo, branch, folder, full, results):
+    # Compare the remote tree with what is installed
+    # -> (manifest, source, installed, changed, removed)
+    print(f"Starting GitHub sync from {repo}/{branch}/{folder or 'root'}")
+
+    # Get file list from GitHub
+    success, github_files = get_github_file_list(repo, branch, folder)
+    if not success:
+        raise OSError(f"Failed to get GitHub file list: {github_files}")
+
+    print(f"Found {len(github_files)} files on GitHub")
+
+    # Each repo/folder tracks its own files, so deletions stay in scope
+    manifest = load_manifest()
+    source = f"{repo}/{folder or ''}"
+    installed = manifest.get(source, {})
+    changed = []
+    remote_paths = set()
+    for file_info in github_files:
+        local_path = file_info["path"]
+        remote_paths.add(local_path)
+
+        # Skip ignored files
+        if any(pattern in local_path for pattern in IGNORE_FILES):
+            results["skipped"].append(local_path)
+        elif not full and _is_current(file_info, installed):
+            results["unchanged"].append(local_path)
+            installed[local_path] = file_info["sha"]
+        else:
+            changed.append(file_info)
+    removed = [p for p in installed if p not in remote_paths]
+
+    print(f"{len(changed)} changed, {len(results['unchanged'])} unchanged")
+    return manifest, source, installed, changed, removed
+
+
+def _new_results():
+    return {
+        "downloaded": [],
+        "failed": [],
+        "skipped": [],
+        "unchanged": [],
+        "deleted": [],
+    }
+
+
+def _sync_shortcut(plan, dry_run, delete_removed, results):
+    # Result when nothing has to be downloaded or deleted, else None
+    manifest, source, installed, changed, removed = plan
+    if dry_run:
+        return {
+            "dry_run": True,
+            "would_download": changed,
+            "would_delete": removed if delete_removed else [],
+        }
+    if not changed and not (delete_removed and removed):
+        manifest[source] = installed
+        save_manifest(manifest)
+        print("GitHub sync: already up to date")
+        return results
+    return None
+
+
+def _finish_sync(txn, plan, delete_removed, results):
+    # Commit the staged files (or nothing, if any failed) and the manifest
+    manifest, source, installed, changed, removed = plan
+    if results["failed"]:
+        txn.abort()
+        return False, (
+            f"{len(results['failed'])} files failed, nothing installed: "
+            + "; ".join(results["failed"])
+        )
+
+    if delete_removed:
+        for local_path in removed:
+            txn.delete(local_path)
+            results["deleted"].append(local_path)
+
+    txn.commit()
+    for file_info in changed:
+        installed[file_info["path"]] = file_info["sha"]
+    for local_path in results["deleted"]:
+        installed.pop(local_path)
+        print(f"✗ Deleted: {local_path}")
+
+    manifest[source] = installed
+    save_manifest(manifest)
+
+    print(f"GitHub sync completed:")
+    print(f"  Downloaded: {len(results['downloaded'])}")
+    print(f"  Unchanged: {len(results['unchanged'])}")
+    print(f"  Deleted: {len(results['deleted'])}")
+    print(f"  Failed: {len(results['failed'])}")
+    print(f"  Skipped: {len(results['skipped'])}")
+
+    return True, results
+
+
+def sync_from_github(
+    repo=None, branch=None, folder=None, dry_run=False, full=False, delete_removed=False
+):
+    """
+    Sync from GitHub repository
+
+    Only files whose blob SHA differs from the installed copy are downloaded
+    (full=True downloads everything). With delete_removed, files installed by
+    an earlier sync that are gone from the repository are deleted.
+
+    Downloads go to the staging area; if any fails nothing is installed.
+    Otherwise all files are committed together (undo with restore_backup())
+    and the manifest is updated as the last step.
+
+    Files are fetched one at a time, one HTTPS connection each; from a
+    running event loop use sync_from_github_async() instead.
+    """
+    repo = repo or DEFAULT_GITHUB_REPO
+    branch = branch or DEFAULT_GITHUB_BRANCH
+    results = _new_results()
+    txn = None
 
-        # Download each file
-        for file_info in github_files:
+    try:
+        plan = _plan_sync(repo, branch, folder, full, results)
+        shortcut = _sync_shortcut(plan, dry_run, delete_removed, results)
+        if shortcut is not None:
+            return True, shortcut
+
+        # Stage every changed file, then install them all in one commit; the
+        # live tree is untouched until every download has been verified
+        txn = OTATransaction()
+        for file_info in plan[3]:
             local_path = file_info["path"]
-            github_path = file_info["github_path"]
-
-            # Skip ignored files
-            if any(pattern in local_path for pattern in IGNORE_FILES):
-                results["skipped"].append(local_path)
-                continue
 
-            # Download file
-            success, content = download_github_file(repo, branch, github_path)
+            # Download file (size and SHA checked before it is staged)
+            success, msg = download_github_file(
+                repo,
+                branch,
+                file_info["github_path"],
+                txn.staged_path(local_path),
+                file_info["size"],
+                file_info["sha"],
+            )
             if success:
-                save_success, save_msg = save_uploaded_file(local_path, content)
-                if save_success:
-                    results["downloaded"].append(local_path)
-                    print(f"✓ Downloaded: {local_path}")
-                else:
-                    results["failed"].append(f"{local_path}: {save_msg}")
+                results["downloaded"].append(local_path)
+                print(f"✓ Staged: {local_path} ({msg})")
             else:
-                results["failed"].append(f"{local_path}: {content}")
+                txn.unstage(local_path)
+                results["failed"].append(f"{local_path}: {msg}")
 
             # Free memory frequently
             gc.collect()
 
-        print(f"GitHub sync completed:")
-        print(f"  Downloaded: {len(results['downloaded'])}")
-        print(f"  Failed: {len(results['failed'])}")
-        print(f"  Skipped: {len(results['skipped'])}")
+        return _finish_sync(txn, plan, delete_removed, results)
+
+    except TransactionBusy:
+        raise  # Left to the caller (the OTA page answers 409)
+    except Exception as e:
+        error_msg = f"GitHub sync failed: {e}"
+        print(error_msg)
+        return False, error_msg
+    finally:
+        if txn:
+            txn.abort()  # No-op once committed
+
+
+async def sync_from_github_async(
+    repo=None,
+    branch=None,
+    folder=None,
+    dry_run=False,
+    full=False,
+    delete_removed=False,
+    on_progress=None,
+):
+    """
+    sync_from_github() for the event loop: changed files are fetched over a
+    few persistent HTTPS connections in parallel (see github_fetch), with
+    retries. on_progress(path, received, size) is called as data arrives.
+    """
+    repo = repo or DEFAULT_GITHUB_REPO
+    branch = branch or DEFAULT_GITHUB_BRANCH
+    results = _new_results()
+    txn = None
+
+    try:
+        plan = _plan_sync(repo, branch, folder, full, results)
+        shortcut = _sync_shortcut(plan, dry_run, delete_removed, results)
+        if shortcut is not None:
+            return True, shortcut
+
+        from .github_fetch import GitHubFetcher
+
+        txn = OTATransaction()
+        fetcher = GitHubFetcher(repo, branch, on_progress=on_progress)
+        failed = await fetcher.download(plan[3], txn.staged_path)
+        for file_info in plan[3]:
+            local_path = file_info["path"]
+            if local_path in failed:
+                txn.unstage(local_path)
+                results["failed"].append(f"{local_path}: {failed[local_path]}")
+            else:
+                results["downloaded"].append(local_path)
+        gc.collect()
 
-        return True, results
+        return _finish_sync(txn, plan, delete_removed, results)
 
+    except TransactionBusy:
+        raise  # Left to the caller (the OTA page answers 409)
     except Exception as e:
         error_msg = f"GitHub sync failed: {e}"
         print(error_msg)
         return False, error_msg
+    finally:
+        if txn:
+            txn.abort()  # No-op once committed
 
 
 # ---------------------------------------------------------
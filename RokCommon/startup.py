@@ -0,0 +1,63 @@
+"""
+Boot Orchestration for RokCommon
+
+Brings a device up as concurrent phases on the event loop instead of one
+fixed sequence padded with sleeps:
+- Wi-Fi associates while the web server starts and assets are precached
+- Services that need the network wait for wifi_ready, not for a delay
+- Every phase is timed (ms since reset) and the timings printed once the
+  device is up
+"""
+
+import time
+import uasyncio as asyncio
+
+from .networking.wifi_manager import wifi_ready
+
+
+class BootTimer:
+    """Start and end (ms since reset) of each named boot phase"""
+
+    def __init__(self):
+        self.phases = []  # (name, start, end)
+        self._last = time.ticks_ms()
+
+    def mark(self, name):
+        """End a sequential phase that began at the previous mark"""
+        now = time.ticks_ms()
+        self.phases.append((name, self._last, now))
+        self._last = now
+
+    async def run(self, name, coro):
+        """Await coro as a phase that may overlap others -> its result"""
+        start = time.ticks_ms()
+        try:
+            return await coro
+        finally:
+            self.phases.append((name, start, time.ticks_ms()))
+
+    def report(self):
+        print("Boot timings (ms since reset):")
+        end = 0
+        for name, start, stop in self.phases:
+            print(f"  {name}: {start} -> {stop} ({time.ticks_diff(stop, start)} ms)")
+            end = max(end, stop)
+        print(f"  ready at {end} ms")
+
+
+# Shared by main.py (sequential phases) and the web servers (async phases)
+boot_timer = BootTimer()
+
+
+async def start_services(services, timer=boot_timer):
+    """Run (name, coroutine) phases concurrently and time each -> results,
+    in order; a phase that raised returns its exception"""
+    return await asyncio.gather(
+        *[timer.run(name, coro) for name, coro in services], return_exceptions=True
+    )
+
+
+async def when_online(coro):
+    """Await coro once Wi-Fi has come up (or fallen back to AP mode)"""
+    await wifi_ready.wait()
+    return await coro
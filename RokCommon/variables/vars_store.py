@@ -8,6 +8,8 @@ CONFIG_FILE = "config.json"
 CONFIG_DEFAULTS_FILE = "config_defaults.json"
 # Cache for the loaded configuration
 _cached_config = None
+# Bumped whenever the cached configuration is loaded or changed
+_config_version = 0
 
 
 # ---------------------------------------------------------
@@ -98,17 +100,21 @@ def save_default_config():
 # Load configuration from root folder (loads project specific config if exists)
 # ---------------------------------------------------------
 def load_config():
-    global _cached_config
+    global _cached_config, _config_version
     config_file = f"{CONFIG_DIR}/{CONFIG_FILE}"
 
     # Try to load existing config
     try:
         with open(config_file, "r") as f:
-            _cached_config = json.load(f)
+            cfg = json.load(f)
     except Exception as e:
         print(f"Config load failed: {e}")
-        _cached_config = None
+        cfg = None
 
+    # Re-reading an unchanged file keeps config-derived caches valid
+    if cfg != _cached_config:
+        _config_version += 1
+    _cached_config = cfg
     return _cached_config
 
 
@@ -116,7 +122,8 @@ def load_config():
 # Load default configuration from project defaults file
 # ---------------------------------------------------------
 def load_config_defaults():
-    global _cached_config
+    global _cached_config, _config_version
+    _config_version += 1
     config_defaults_file = f"{CONFIG_DIR}/{CONFIG_DEFAULTS_FILE}"
 
     # Try to load project defaults
@@ -154,11 +161,21 @@ def get_config_value(key, default=None):
     return None
 
 
+# ---------------------------------------------------------
+# Version of the cached configuration; changes whenever it is saved, or
+# reloaded with different contents
+# Lets callers cache anything derived from config and notice when it is stale
+# ---------------------------------------------------------
+def get_config_version():
+    return _config_version
+
+
 # ---------------------------------------------------------
 # Save a specific configuration value
 # ---------------------------------------------------------
 def save_config_value(key, value):
-    global _cached_config
+    global _cached_config, _config_version
+    _config_version += 1
     if _cached_config is None:
         _cached_config = minimal_default_config()
 
@@ -178,7 +195,8 @@ def save_config_value(key, value):
 # Save configuration to file and update cache
 # ---------------------------------------------------------
 def save_config(cfg):
-    global _cached_config
+    global _cached_config, _config_version
+    _config_version += 1
 
     # Update cache first
     _cached_config = cfg
@@ -197,7 +197,7 @@ class APIHandler:
             response = (
                 f"HTTP/1.1 {status}\r\n"
                 f"Content-Type: application/json\r\n"
-                f"Content-Length: {len(json_data)}\r\n"
+                f"Content-Length: {len(json_data.encode())}\r\n"
                 f"Access-Control-Allow-Origin: *\r\n"
                 f"Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
                 f"Access-Control-Allow-Headers: Content-Type\r\n"
@@ -210,7 +210,7 @@ class APIHandler:
             return (
                 f"HTTP/1.1 500 Internal Server Error\r\n"
                 f"Content-Type: application/json\r\n"
-                f"Content-Length: {len(error_msg)}\r\n"
+                f"Content-Length: {len(error_msg.encode())}\r\n"
                 f"\r\n"
                 f"{error_msg}"
             )
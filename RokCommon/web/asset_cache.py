@@ -0,0 +1,105 @@
+"""
+Shared Memory-Budgeted Asset Cache for RokCommon
+
+One LRU cache for everything the web servers keep in RAM:
+- Static assets as ready-to-send (header bytes, body bytes) pairs
+- Page templates (until rendered by the template engine)
+
+Entries are charged by size against a byte budget; the least recently used
+ones are evicted to make room, and the whole cache shrinks when the heap runs
+low. A hit returns the stored object as-is: no re-reading, encoding or
+copying of the content.
+"""
+
+import gc
+
+# Total bytes the cache may hold, and the largest single entry it accepts
+CACHE_BUDGET = 64 * 1024
+MAX_ENTRY_SIZE = CACHE_BUDGET // 2
+
+# Below this much free heap the cache gives memory back
+LOW_MEMORY_BYTES = 32 * 1024
+
+
+class AssetCache:
+    """Byte-budgeted LRU cache: key -> value, each with a caller-given size"""
+
+    def __init__(self, budget=CACHE_BUDGET, max_entry=MAX_ENTRY_SIZE):
+        self.budget = budget
+        self.max_entry = max_entry
+        self.used = 0
+        self._entries = {}  # key -> [value, size, last_used]
+        self._tick = 0
+
+    def get(self, key):
+        """Cached value or None; marks the entry as recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._tick += 1
+        entry[2] = self._tick
+        return entry[0]
+
+    def put(self, key, value, size):
+        """Store a value, evicting LRU entries to fit. Returns False if the
+        value is too large to cache or memory is too low."""
+        self.remove(key)
+        if size > self.max_entry:
+            return False
+        while self.used + size > self.budget and self._entries:
+            self._evict_lru()
+        if memory_low():
+            gc.collect()
+            self.shrink()
+            if memory_low():
+                return False
+        self._tick += 1
+        self._entries[key] = [value, size, self._tick]
+        self.used += size
+        return True
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.used -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.used = 0
+        gc.collect()
+
+    def full(self):
+        return self.used >= self.budget
+
+    def _evict_lru(self):
+        # Linear scan; the cache holds tens of entries, not thousands
+        oldest = None
+        oldest_tick = None
+        for key, entry in self._entries.items():
+            if oldest_tick is None or entry[2] < oldest_tick:
+                oldest = key
+                oldest_tick = entry[2]
+        self.remove(oldest)
+
+    def shrink(self):
+        """Evict LRU entries until the heap has room again (or the cache is
+        empty). Cheap to call when memory is fine."""
+        if not memory_low():
+            return
+        while self._entries:
+            self._evict_lru()
+            gc.collect()
+            if not memory_low():
+                break
+
+
+def memory_low():
+    """True when free heap is below LOW_MEMORY_BYTES"""
+    try:
+        return gc.mem_free() < LOW_MEMORY_BYTES
+    except AttributeError:
+        return False  # Not MicroPython
+
+
+# Shared instance used by static_assets and the project web servers
+asset_cache = AssetCache()
@@ -0,0 +1,215 @@
+"""
+Streaming multipart/form-data Parser for RokCommon
+
+Parses an upload straight off the socket in fixed-size chunks, so a request
+body never has to fit in RAM:
+- One preallocated buffer per upload; part data is handed out as memoryview
+  slices of it (e.g. to file.write)
+- Boundary search in viper on MicroPython
+- Reads never go past the request's Content-Length, so keep-alive stays in sync
+- Byte counts for progress reporting
+"""
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+DEFAULT_CHUNK_SIZE = 1024
+MAX_FIELD_SIZE = 1024  # Non-file fields are small form values
+
+
+class MultipartError(Exception):
+    """Malformed or truncated multipart body"""
+
+
+if micropython:
+
+    @micropython.viper
+    def _find(buf: ptr8, start: int, end: int, pat: ptr8, plen: int) -> int:
+        last = end - plen
+        first = pat[0]
+        i = start
+        while i <= last:
+            if buf[i] == first:
+                j = 1
+                while j < plen and buf[i + j] == pat[j]:
+                    j += 1
+                if j == plen:
+                    return i
+            i += 1
+        return -1
+
+else:
+
+    def _find(buf, start, end, pat, plen):
+        return buf.find(pat, start, end)
+
+
+def parse_boundary(content_type):
+    """Boundary parameter of a multipart Content-Type, or None"""
+    if "boundary=" not in content_type:
+        return None
+    boundary = content_type.split("boundary=", 1)[1].split(";", 1)[0].strip()
+    return boundary.strip('"') or None
+
+
+def parse_disposition(value):
+    """Content-Disposition header -> (field name, filename or None)"""
+    name = None
+    filename = None
+    for param in value.split(";"):
+        param = param.strip()
+        if param.startswith("name="):
+            name = param[5:].strip('"')
+        elif param.startswith("filename="):
+            filename = param[9:].strip('"')
+    return name, filename
+
+
+class MultipartReader:
+    """
+    Pull parser over a uasyncio stream
+
+    Usage:
+        parser = MultipartReader(reader, boundary, content_length)
+        while True:
+            headers = await parser.next_part()
+            if headers is None:
+                break
+            await parser.read_part(f.write)  # or: await parser.read_value()
+    """
+
+    def __init__(self, reader, boundary, length, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.reader = reader
+        self.total = length
+        self.remaining = length  # Body bytes still on the socket
+        self._delim = b"\r\n--" + boundary.encode()
+        self._buf = bytearray(chunk_size + len(self._delim))
+        self._mv = memoryview(self._buf)
+        # The first boundary has no leading CRLF; pretend it does so one
+        # delimiter search handles every boundary
+        self._buf[0:2] = b"\r\n"
+        self._start = 0
+        self._end = 2
+        self._done = False
+        self._readinto = getattr(reader, "readinto", None)
+
+    @property
+    def received(self):
+        return self.total - self.remaining
+
+    async def _fill(self):
+        # Compact the unread bytes to the front, then read more after them
+        start, end = self._start, self._end
+        if start:
+            n = end - start
+            self._mv[0:n] = self._mv[start:end]
+            self._start, self._end = 0, n
+        space = min(len(self._buf) - self._end, self.remaining)
+        if space <= 0:
+            return 0
+        if self._readinto:
+            got = await self._readinto(self._mv[self._end : self._end + space])
+        else:
+            chunk = await self.reader.read(space)
+            got = len(chunk) if chunk else 0
+            self._mv[self._end : self._end + got] = chunk
+        if not got:
+            raise MultipartError("Upload truncated")
+        self._end += got
+        self.remaining -= got
+        return got
+
+    async def _skip_to_boundary(self, write=None):
+        # Stream bytes up to the next delimiter to write(), consume it
+        delim = self._delim
+        dlen = len(delim)
+        while True:
+            i = _find(self._buf, self._start, self._end, delim, dlen)
+            if i >= 0:
+                if write and i > self._start:
+                    write(self._mv[self._start : i])
+                self._start = i + dlen
+                return
+            # Keep a possible partial delimiter at the end for the next round
+            safe = self._end - dlen + 1
+            if safe > self._start:
+                if write:
+                    write(self._mv[self._start : safe])
+                self._start = safe
+            if not self.remaining:
+                raise MultipartError("Missing closing boundary")
+            await self._fill()
+
+    async def _read_line(self):
+        # One header line (without CRLF) as str
+        while True:
+            i = _find(self._buf, self._start, self._end, b"\r\n", 2)
+            if i >= 0:
+                line = bytes(self._mv[self._start : i]).decode()
+                self._start = i + 2
+                return line
+            if self._start == 0 and self._end == len(self._buf):
+                raise MultipartError("Part header too long")
+            if not self.remaining:
+                raise MultipartError("Upload truncated")
+            await self._fill()
+
+    async def next_part(self):
+        """Advance to the next part -> dict of its lowercased headers, or None
+        after the last part. Unread data of the current part is skipped."""
+        if self._done:
+            return None
+        await self._skip_to_boundary()
+        while self._end - self._start < 2:
+            if not self.remaining:
+                raise MultipartError("Upload truncated")
+            await self._fill()
+        if self._buf[self._start] == 0x2D and self._buf[self._start + 1] == 0x2D:
+            self._done = True  # "--" after the boundary closes the body
+            return None
+        await self._read_line()  # Rest of the boundary line
+        headers = {}
+        while True:
+            line = await self._read_line()
+            if not line:
+                break
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        return headers
+
+    async def read_part(self, write):
+        """Stream the current part's data to write(memoryview) -> byte count.
+        The memoryview is only valid during the call."""
+        count = 0
+
+        def _counted(mv):
+            nonlocal count
+            count += len(mv)
+            write(mv)
+
+        # Leave the delimiter unconsumed so next_part() sees it
+        await self._skip_to_boundary(_counted)
+        self._start -= len(self._delim)
+        return count
+
+    async def read_value(self, limit=MAX_FIELD_SIZE):
+        """Current part's data as str (form fields)"""
+        value = bytearray()
+
+        def _append(mv):
+            if len(value) + len(mv) > limit:
+                raise MultipartError("Form field too large")
+            value.extend(mv)
+
+        await self.read_part(_append)
+        return str(value, "utf-8")
+
+    async def finish(self):
+        """Discard whatever is left of the body (epilogue or an aborted upload)"""
+        while self.remaining:
+            self._start = self._end = 0
+            await self._fill()
+        self._done = True
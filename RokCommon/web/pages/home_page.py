@@ -9,12 +9,12 @@ Features:
 - WebSocket busy status (Vehicle only)
 - IP address display
 - Memory information
-- Navigation via header
+- Navigation via header (rendered once per config change and shared by all pages)
 """
 
 from ..request_response import Request, Response, PageHandler
 from ...variables.vars_store import get_config_value
-from ..static_assets import load_template
+from ..template import Template, get_template, render_cached
 import gc
 
 try:
@@ -25,6 +25,44 @@ except Exception:
     network = None
     network_available = False
 
+VEHICLE_BUSY_SCRIPT = """
+            // Vehicle has WebSocket busy status
+            if (js.busy !== undefined) {
+                document.getElementById('vehicle_status').textContent = js.busy ? 'Vehicle is busy' : 'Vehicle is ready';
+                document.getElementById('vehicle_status').style.color = js.busy ? '#dc3545' : '#28a745';
+            } else {
+                document.getElementById('vehicle_status').textContent = 'Vehicle is ready';
+                document.getElementById('vehicle_status').style.color = '#28a745';
+            }"""
+
+DEVICE_READY_SCRIPT = """
+            // Vision device - no WebSocket, always ready
+            document.getElementById('vehicle_status').textContent = 'Device is ready';
+            document.getElementById('vehicle_status').style.color = '#28a745';"""
+
+# Minimal templates for when the asset files are missing
+FALLBACK_HEADER_NAV = """<header>
+<h1>{{ vehicle_name }}</h1>
+<nav>
+<a href="/">Home</a> | <a href="/wifi">WiFi</a> | <a href="/admin">Admin</a> | <a href="/testing">{{ testing_label }}</a> | <a href="/ota">OTA</a>
+{{ play_link }}
+</nav>
+</header>"""
+
+FALLBACK_HOME_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{{ vehicle_name }}</title></head>
+<body>
+{{ header_nav }}
+<h2>Device Information</h2>
+<p>Type: {{ device_type }}</p>
+<p>IP: {{ ip }}</p>
+<p>Memory: {{ memory_info }}</p>
+<p id="vehicle_status">Loading...</p>
+<script>{{ busy_status_script }}</script>
+</body>
+</html>"""
+
 
 class HomePageHandler(PageHandler):
     """
@@ -46,54 +84,31 @@ class HomePageHandler(PageHandler):
             return Response.server_error(f"Home page error: {e}")
 
     def _render_home_page(self):
-        """Generate HTML for the unified home page"""
+        """Render the unified home page (header from cache, live values per request)"""
         # Get basic device information from config
         vehicle_name = get_config_value("vehicleName", "Unnamed Device")
         device_type = get_config_value("vehicleType", "Unknown")
         project_type = get_config_value("projectType", "unknown")
 
-        # Get network information
-        ip = self._get_ip_address()
-
         # Get memory information
         free_mem = gc.mem_free()
-        memory_info = f"{round(free_mem / 1024)} KB free"
-
-        # Load templates
-        header_nav = self.load_and_process_header(vehicle_name, project_type)
-        html_content = self._load_asset_template("home_page.html")
 
         # Set project-specific busy status script
         if project_type == "vehicle":
-            busy_status_script = """
-            // Vehicle has WebSocket busy status
-            if (js.busy !== undefined) {
-                document.getElementById('vehicle_status').textContent = js.busy ? 'Vehicle is busy' : 'Vehicle is ready';
-                document.getElementById('vehicle_status').style.color = js.busy ? '#dc3545' : '#28a745';
-            } else {
-                document.getElementById('vehicle_status').textContent = 'Vehicle is ready';
-                document.getElementById('vehicle_status').style.color = '#28a745';
-            }"""
+            busy_status_script = VEHICLE_BUSY_SCRIPT
         else:
-            busy_status_script = """
-            // Vision device - no WebSocket, always ready
-            document.getElementById('vehicle_status').textContent = 'Device is ready';
-            document.getElementById('vehicle_status').style.color = '#28a745';"""
-
-        # Simple template replacements
-        replacements = {
-            "{{ header_nav }}": header_nav,
-            "{{ vehicle_name }}": vehicle_name,
-            "{{ device_type }}": device_type,
-            "{{ ip }}": ip,
-            "{{ memory_info }}": memory_info,
-            "{{ busy_status_script }}": busy_status_script,
-        }
-
-        for placeholder, value in replacements.items():
-            html_content = html_content.replace(placeholder, str(value))
-
-        return html_content
+            busy_status_script = DEVICE_READY_SCRIPT
+
+        return self._asset_template("home_page.html").render(
+            {
+                "header_nav": self.load_and_process_header(vehicle_name, project_type),
+                "vehicle_name": vehicle_name,
+                "device_type": device_type,
+                "ip": self._get_ip_address(),
+                "memory_info": f"{round(free_mem / 1024)} KB free",
+                "busy_status_script": busy_status_script,
+            }
+        )
 
     def _get_ip_address(self):
         """Return the active IP address (STA preferred, then AP)"""
@@ -112,63 +127,42 @@ class HomePageHandler(PageHandler):
 
         return "Unavailable"
 
-    def _load_asset_template(self, filename):
-        """Load template from RokCommon assets directory with fallback"""
-        # Try main path first
-        content = load_template(f"RokCommon/web/pages/assets/{filename}")
-        if content is not None:
-            return content
-
-        # Fallback to relative path
-        content = load_template(f"web/pages/assets/{filename}")
-        if content is not None:
-            return content
+    def _asset_template(self, filename):
+        """Compiled template from RokCommon assets directory with fallback"""
+        template = get_template(
+            f"RokCommon/web/pages/assets/{filename}", f"web/pages/assets/{filename}"
+        )
+        if template is not None:
+            return template
 
         # Final fallback - minimal template
         if filename == "header_nav.html":
-            return """<header>
-<h1>{{ vehicle_name }}</h1>
-<nav>
-<a href="/">Home</a> | <a href="/wifi">WiFi</a> | <a href="/admin">Admin</a> | <a href="/testing">{{ testing_label }}</a> | <a href="/ota">OTA</a>
-{{ play_link }}
-</nav>
-</header>"""
+            return Template(FALLBACK_HEADER_NAV)
         elif filename == "home_page.html":
-            return """<!DOCTYPE html>
-<html>
-<head><title>{{ vehicle_name }}</title></head>
-<body>
-{{ header_nav }}
-<h2>Device Information</h2>
-<p>Type: {{ device_type }}</p>
-<p>IP: {{ ip }}</p>
-<p>Memory: {{ memory_info }}</p>
-<p id="vehicle_status">Loading...</p>
-<script>{{ busy_status_script }}</script>
-</body>
-</html>"""
+            return Template(FALLBACK_HOME_PAGE)
         else:
-            return f"<html><body><h1>Template not found: {filename}</h1></body></html>"
+            return Template(
+                f"<html><body><h1>Template not found: {filename}</h1></body></html>"
+            )
 
-    def process_header_nav(self, header_nav, vehicle_name=None, project_type=None):
+    def load_and_process_header(self, vehicle_name=None, project_type=None):
         """
-        Process header navigation template with project-specific elements.
-        This is a shared function that all pages should use for consistent header handling.
+        Render the header/nav with project-specific elements -> bytes.
+        This is a shared function that all pages should use; the result is
+        cached until the config changes.
         """
-        if not header_nav:
-            return ""
-
         # Use passed values or get defaults
         if vehicle_name is None:
             vehicle_name = get_config_value("vehicleName", "Unknown Device")
         if project_type is None:
             project_type = get_config_value("projectType", "unknown")
 
-        # Replace vehicle name
-        header_nav = header_nav.replace(
-            "{{ vehicle_name }}", vehicle_name or "Unknown Device"
+        return render_cached(
+            f"header_nav|{vehicle_name}|{project_type}",
+            lambda: self._render_header(vehicle_name, project_type),
         )
 
+    def _render_header(self, vehicle_name, project_type):
         # Set project-specific navigation elements
         if project_type == "vehicle":
             testing_label = "Motor Config"
@@ -177,34 +171,20 @@ class HomePageHandler(PageHandler):
             testing_label = "Stream Testing"
             play_link = ""
 
-        # Replace project-specific placeholders
-        header_nav = header_nav.replace("{{ testing_label }}", testing_label)
-        header_nav = header_nav.replace("{{ play_link }}", play_link)
-
-        return header_nav
-
-    def load_and_process_header(self, vehicle_name=None, project_type=None):
-        """
-        Load and process header template with fallbacks.
-        This is a shared function that all pages should use.
-        """
-        # Load header template with fallback
-        header_nav = self._load_asset_template("header_nav.html")
-
-        # Process with project-specific elements
-        return self.process_header_nav(header_nav, vehicle_name, project_type)
+        return self._asset_template("header_nav.html").render(
+            {
+                "vehicle_name": vehicle_name or "Unknown Device",
+                "testing_label": testing_label,
+                "play_link": play_link,
+            }
+        )
 
 
 # Unified home handler - no project-specific content injection
 home_handler = HomePageHandler()
 
 
-# Global functions for shared header processing that other pages can use
+# Global function for shared header processing that other pages can use
 def load_and_process_header(vehicle_name=None, project_type=None):
-    """Global function for loading and processing header across all pages"""
+    """Global function for the rendered header across all pages -> bytes"""
     return home_handler.load_and_process_header(vehicle_name, project_type)
-
-
-def load_header_template(filename="header_nav.html"):
-    """Global function for loading header template with fallbacks"""
-    return home_handler._load_asset_template(filename)
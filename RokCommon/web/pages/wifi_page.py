@@ -17,6 +17,7 @@ from ...variables.vars_store import (
     save_config_value,
 )
 from .home_page import load_and_process_header
+from ..template import Template, get_template
 
 try:
     import network
@@ -84,7 +85,7 @@ class WiFiPageHandler(PageHandler):
             save_config_value("wifi_error", None)
 
             # Redirect to WiFi page
-            return Response.redirect("/wifi")
+            return Response.redirect_to("/wifi")
 
         except Exception as e:
             print(f"WiFi page POST error: {e}")
@@ -119,67 +120,38 @@ class WiFiPageHandler(PageHandler):
             else:
                 status_html = f"<div style='background:#ffcdd2;color:#b71c1c;padding:8px 0 8px 0;margin-bottom:12px;border-radius:6px;font-weight:bold;'>Not connected to WiFi</div>"
 
-        # Load WiFi page HTML template with error checking
-        html_content = self._load_asset_template("wifi_page.html")
-        header_nav = load_and_process_header(vehicle_name)
-
-        # Ensure we have valid templates
-        if html_content is None or header_nav is None:
-            print(
-                f"WiFi template loading failed: html_content={html_content is not None}, header_nav={header_nav is not None}"
-            )
-            return "<html><body><h1>WiFi Template Loading Error</h1><p>Failed to load page templates</p></body></html>"
-
-        # Prepare template replacements with safe string conversion
+        # Prepare template values
         static_fields_display = "" if ip_mode == "static" else "display:none;"
 
-        # Replace all template variables
-        replacements = {
-            "{{ header_nav }}": header_nav or "",
-            "{{ status_html }}": status_html or "",
-            "{{ error_msg }}": error_msg or "",
-            "{{ ssid_val }}": ssid_val or "",
-            "{{ vehicle_name }}": vehicle_name or "Unknown Device",
-            "{{ dhcp_checked }}": "checked" if ip_mode == "dhcp" else "",
-            "{{ static_checked }}": "checked" if ip_mode == "static" else "",
-            "{{ static_fields_display }}": static_fields_display or "",
-            "{{ static_ip }}": static_ip or "",
-            "{{ static_mask }}": static_mask or "",
-            "{{ static_gw }}": static_gw or "",
-            "{{ static_dns }}": static_dns or "",
-            "{{ scan_modal }}": "",  # Scan functionality removed for simplicity
-        }
-
-        for placeholder, value in replacements.items():
-            if html_content and value is not None:  # Only replace if both are valid
-                html_content = html_content.replace(placeholder, str(value))
-
-        return html_content
-
-    def _load_asset_template(self, filename):
-        """Load template from RokCommon assets directory with fallback"""
-        from ..static_assets import load_template
-
-        # Try main path first
-        content = load_template(f"RokCommon/web/pages/assets/{filename}")
-        if content is not None:
-            return content
-
-        # Fallback to relative path
-        content = load_template(f"web/pages/assets/{filename}")
-        if content is not None:
-            return content
+        return self._wifi_template().render(
+            {
+                "header_nav": load_and_process_header(vehicle_name),
+                "status_html": status_html,
+                "error_msg": error_msg,
+                "ssid_val": ssid_val or "",
+                "vehicle_name": vehicle_name or "Unknown Device",
+                "dhcp_checked": "checked" if ip_mode == "dhcp" else "",
+                "static_checked": "checked" if ip_mode == "static" else "",
+                "static_fields_display": static_fields_display,
+                "static_ip": static_ip or "",
+                "static_mask": static_mask or "",
+                "static_gw": static_gw or "",
+                "static_dns": static_dns or "",
+                "scan_modal": "",  # Scan functionality removed for simplicity
+            }
+        )
+
+    def _wifi_template(self):
+        """Compiled WiFi page template from RokCommon assets with fallback"""
+        template = get_template(
+            "RokCommon/web/pages/assets/wifi_page.html", "web/pages/assets/wifi_page.html"
+        )
+        if template is not None:
+            return template
 
         # Final fallback - minimal template
-        if filename == "header_nav.html":
-            return """<header>
-<h1>{{ vehicle_name }}</h1>
-<nav>
-<a href="/">Home</a> | <a href="/wifi">WiFi</a> | <a href="/admin">Admin</a> | <a href="/testing">Testing</a> | <a href="/ota">OTA</a>
-</nav>
-</header>"""
-        elif filename == "wifi_page.html":
-            return """<!DOCTYPE html>
+        return Template(
+            """<!DOCTYPE html>
 <html>
 <head><title>WiFi Configuration - {{ vehicle_name }}</title></head>
 <body>
@@ -202,8 +174,7 @@ class WiFiPageHandler(PageHandler):
 </form>
 </body>
 </html>"""
-        else:
-            return f"<html><body><h1>Template not found: {filename}</h1></body></html>"
+        )
 
 
 # Create the handler instance
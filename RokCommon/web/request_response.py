@@ -10,6 +10,8 @@ Key Features:
 - Consistent page handler interface: handler(request) -> response
 - Automatic content-type detection and JSON serialization
 - Memory-efficient string handling for ESP32
+- Streaming bodies: rendered templates, files, memoryviews and iterables
+  (chunked transfer encoding when the length is unknown)
 """
 
 try:
@@ -17,6 +19,9 @@ try:
 except ImportError:
     import json
 
+# Largest slice written per drain when streaming a body
+SEND_CHUNK_SIZE = 1024
+
 
 class Request:
     """Unified HTTP request object"""
@@ -36,6 +41,10 @@ class Request:
         self.body = body
         self.headers = headers or {}
         self.content_type = content_type
+        self.keep_alive = False  # Set by the HTTP engine from the request
+        self.version = "HTTP/1.1"
+        # Bytes of a multipart body still on the socket (uploads are streamed)
+        self.body_pending = 0
 
         # Parse query parameters
         self.query = {}
@@ -51,7 +60,11 @@ class Request:
             except Exception:
                 pass  # Ignore malformed query strings
 
-        # Parse form data if POST with form content
+        self.set_body(body)
+
+    def set_body(self, body):
+        """Set the body, parsing form data if POST with form content"""
+        self.body = body
         self.form = {}
         if (
             self.method == "POST"
@@ -83,7 +96,14 @@ class Request:
 
 
 class Response:
-    """Unified HTTP response object"""
+    """
+    Unified HTTP response object
+
+    The body may be str, bytes, bytearray or memoryview (sent with a
+    Content-Length), a rendered template, an open file (streamed through a
+    fixed buffer, then closed) or any other iterable of str/bytes pieces
+    (sent with chunked transfer encoding).
+    """
 
     def __init__(
         self, status="200 OK", content_type="text/html", body="", redirect=None
@@ -144,13 +164,39 @@ class Response:
         )
 
     def to_bytes(self):
-        """Convert response body to bytes for transmission"""
-        if isinstance(self.body, str):
-            return self.body.encode("utf-8")
-        elif isinstance(self.body, bytes):
-            return self.body
+        """Whole body as bytes (send_response streams instead where it can)"""
+        body = self.body
+        if isinstance(body, str):
+            return body.encode("utf-8")
+        elif isinstance(body, (bytes, bytearray)):
+            return body
+        elif isinstance(body, memoryview):
+            return bytes(body)
+        elif hasattr(body, "to_bytes"):
+            return body.to_bytes()  # Rendered template
+        elif hasattr(body, "readinto"):
+            try:
+                return body.read()
+            finally:
+                body.close()
+        elif _is_iterable(body):
+            return b"".join(_as_bytes(piece) for piece in body)
         else:
-            return str(self.body).encode("utf-8")
+            return str(body).encode("utf-8")
+
+
+def _as_bytes(piece):
+    if isinstance(piece, str):
+        return piece.encode("utf-8")
+    return piece
+
+
+def _is_iterable(body):
+    try:
+        iter(body)
+        return True
+    except TypeError:
+        return False
 
 
 class PageHandler:
@@ -231,48 +277,141 @@ def parse_headers(lines):
     return headers, content_type
 
 
-async def send_response(writer, response):
-    """Send unified Response object to client"""
+async def send_response(writer, response, keep_alive=True, chunked=True):
+    """
+    Send unified Response object to client
+
+    Bodies are written as memoryview slices of at most SEND_CHUNK_SIZE bytes,
+    so nothing is copied on the way out. Bodies of unknown length use chunked
+    transfer encoding, or are sent until close when the client can't accept it
+    (chunked=False, i.e. HTTP/1.0).
+
+    Returns:
+        True if the connection can carry another request
+    """
+    connection = "" if keep_alive else "Connection: close\r\n"
+    head = f"HTTP/1.1 {response.status}\r\nContent-Type: {response.content_type}\r\n"
+    body = response.body
     try:
         # Handle redirects
         if response.redirect:
             header = (
-                f"HTTP/1.1 {response.status}\r\nLocation: {response.redirect}\r\n\r\n"
+                f"HTTP/1.1 {response.status}\r\nLocation: {response.redirect}\r\n"
+                f"Content-Length: 0\r\n{connection}\r\n"
             )
             writer.write(header)
             await writer.drain()
-            return
+            return True
 
-        # Convert body to bytes
-        body_bytes = response.to_bytes()
+        # Rendered templates write their segments straight to the socket
+        if hasattr(body, "write_to"):
+            writer.write(f"{head}Content-Length: {len(body)}\r\n{connection}\r\n")
+            await body.write_to(writer)
+            return True
 
-        # Send headers
-        header = f"HTTP/1.1 {response.status}\r\nContent-Type: {response.content_type}\r\nContent-Length: {len(body_bytes)}\r\n\r\n"
-        writer.write(header)
-        await writer.drain()
+        if hasattr(body, "readinto"):
+            return await _send_file_body(writer, head, body, connection, chunked)
 
-        # Send body in chunks to prevent blocking
-        chunk_size = 1024
-        for i in range(0, len(body_bytes), chunk_size):
-            chunk = body_bytes[i : i + chunk_size]
-            writer.write(chunk)
-            await writer.drain()
-
-            # Yield control every 4KB to prevent blocking
-            if i % (chunk_size * 4) == 0:
-                import uasyncio as asyncio
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, (bytes, bytearray, memoryview)):
+            if _is_iterable(body):
+                return await _send_iterable_body(writer, head, body, connection, chunked)
+            body = str(body).encode("utf-8")
 
-                await asyncio.sleep(0)
+        writer.write(f"{head}Content-Length: {len(body)}\r\n{connection}\r\n")
+        await _write_slices(writer, memoryview(body))
+        return True
 
     except Exception as e:
         print(f"Error sending response: {e}")
         # Try to send a basic error response
         try:
-            error_msg = "HTTP/1.1 500 Internal Server Error\r\n\r\nResponse send failed"
+            error_msg = "HTTP/1.1 500 Internal Server Error\r\nContent-Length: 20\r\nConnection: close\r\n\r\nResponse send failed"
             writer.write(error_msg)
             await writer.drain()
         except Exception:
             pass
+        return False
+
+
+async def _write_slices(writer, mv):
+    # Zero-copy: each write is a view into the caller's buffer
+    for i in range(0, len(mv), SEND_CHUNK_SIZE):
+        writer.write(mv[i : i + SEND_CHUNK_SIZE])
+        await writer.drain()
+    if not len(mv):
+        await writer.drain()
+
+
+async def _send_file_body(writer, head, f, connection, chunked):
+    try:
+        # Remaining length from the current position, if the file can seek
+        try:
+            start = f.tell()
+            f.seek(0, 2)
+            length = f.tell() - start
+            f.seek(start)
+        except Exception:
+            length = None
+
+        if length is not None:
+            writer.write(f"{head}Content-Length: {length}\r\n{connection}\r\n")
+        elif chunked:
+            writer.write(f"{head}Transfer-Encoding: chunked\r\n{connection}\r\n")
+        else:
+            writer.write(f"{head}Connection: close\r\n\r\n")
+
+        buf = bytearray(SEND_CHUNK_SIZE)
+        mv = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            if length is None and chunked:
+                await _write_chunk(writer, mv[:n])
+            else:
+                writer.write(mv[:n])
+                await writer.drain()
+    finally:
+        f.close()
+
+    if length is not None:
+        return True
+    if chunked:
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return True
+    return False  # Body ends at connection close
+
+
+async def _send_iterable_body(writer, head, pieces, connection, chunked):
+    if chunked:
+        writer.write(f"{head}Transfer-Encoding: chunked\r\n{connection}\r\n")
+    else:
+        writer.write(f"{head}Connection: close\r\n\r\n")
+    for piece in pieces:
+        mv = memoryview(_as_bytes(piece))
+        if not len(mv):
+            continue  # An empty chunk would end the body early
+        for i in range(0, len(mv), SEND_CHUNK_SIZE):
+            if chunked:
+                await _write_chunk(writer, mv[i : i + SEND_CHUNK_SIZE])
+            else:
+                writer.write(mv[i : i + SEND_CHUNK_SIZE])
+                await writer.drain()
+    if not chunked:
+        return False  # Body ends at connection close
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+    return True
+
+
+async def _write_chunk(writer, mv):
+    writer.write(f"{len(mv):x}\r\n")
+    writer.write(mv)
+    writer.write(b"\r\n")
+    await writer.drain()
 
 
 # Legacy adapter functions for backward compatibility
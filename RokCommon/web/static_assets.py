@@ -3,12 +3,20 @@ Shared Static Asset Utilities for RokCommon
 
 This module provides common utilities for serving static assets across projects:
 - Content type mapping
-- Template caching system
+- Template and asset caching via the shared budgeted cache (asset_cache.py)
 - Asset serving utilities
+- Precompressed (.gz) variants for clients that accept gzip
+- Content-hash ETags, 304 Not Modified and fingerprinted (?v=) asset URLs
 - Unified HTTP responses
 """
 
 import gc
+from .asset_cache import asset_cache, memory_low
+
+try:
+    import ujson as json
+except ImportError:
+    import json
 
 
 # Universal content type mapping
@@ -31,9 +39,27 @@ CONTENT_TYPES = {
     ".md": "text/markdown",
 }
 
-# Global template cache for performance
-_template_cache = {}
-_cache_enabled = True
+# Chunk size for streaming files from flash
+FILE_CHUNK_SIZE = 1024
+
+# Folder served under /assets/ (relative to the project root on the device)
+ASSET_DIR = "web/pages/assets"
+# Content hashes written by tools/build_assets.py; hashed on device if missing
+ASSET_MANIFEST = "asset_manifest.json"
+ASSET_HASH_LEN = 16  # Hex digits of SHA-256 kept for ETags and ?v= fingerprints
+
+# Fingerprinted URLs never change content; anything else revalidates (-> 304)
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Final header line per cache policy, prebuilt so cache hits send as-is
+_CACHE_CONTROL_LINES = {
+    IMMUTABLE_CACHE: f"Cache-Control: {IMMUTABLE_CACHE}\r\n\r\n".encode(),
+    REVALIDATE_CACHE: f"Cache-Control: {REVALIDATE_CACHE}\r\n\r\n".encode(),
+}
+
+# Asset hashes per folder, {dir: {name: hash}}; computed once per boot
+_asset_hashes = {}
 
 
 def get_content_type(filepath):
@@ -60,112 +86,284 @@ def is_binary_asset(filepath):
     return any(filepath.endswith(ext) for ext in binary_extensions)
 
 
-def load_template(filepath):
-    """Load and cache template files for better performance"""
-    global _template_cache
+def accepts_gzip(headers):
+    """Check whether the client sent Accept-Encoding: gzip"""
+    return "gzip" in headers.get("accept-encoding", "")
 
-    if not _cache_enabled or filepath not in _template_cache:
-        try:
-            with open(filepath, "r") as f:
-                content = f.read()
-            if _cache_enabled:
-                _template_cache[filepath] = content
-            return content
-        except Exception as e:
-            print(f"Template load error {filepath}: {e}")
-            return None
-    return _template_cache[filepath]
 
+def _hash_file(filepath):
+    import hashlib
+    import ubinascii
 
-def clear_template_cache():
-    """Clear template cache to free memory or reload templates"""
-    global _template_cache
-    _template_cache.clear()
-    gc.collect()
+    sha = hashlib.sha256()
+    buf = bytearray(FILE_CHUNK_SIZE)
+    mv = memoryview(buf)
+    with open(filepath, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            sha.update(mv[:n])
+    return ubinascii.hexlify(sha.digest()).decode()[:ASSET_HASH_LEN]
+
+
+def get_asset_hashes(asset_dir=ASSET_DIR):
+    """Content hash of every asset in a folder -> {name: hash}, cached"""
+    hashes = _asset_hashes.get(asset_dir)
+    if hashes is not None:
+        return hashes
+
+    try:
+        with open(f"{asset_dir}/{ASSET_MANIFEST}", "r") as f:
+            hashes = json.load(f)
+    except Exception:
+        # No build manifest on this device; hash the files once
+        import os
 
+        hashes = {}
+        try:
+            names = os.listdir(asset_dir)
+        except OSError:
+            names = []
+        for name in names:
+            if name.endswith(".gz") or name == ASSET_MANIFEST:
+                continue
+            try:
+                hashes[name] = _hash_file(f"{asset_dir}/{name}")
+            except OSError:
+                pass  # Subfolder or unreadable
+    _asset_hashes[asset_dir] = hashes
+    return hashes
+
+
+def asset_etag(filepath):
+    """Strong ETag for an asset file, None if it isn't a known asset"""
+    if "/" in filepath:
+        asset_dir, name = filepath.rsplit("/", 1)
+    else:
+        asset_dir, name = ".", filepath
+    digest = get_asset_hashes(asset_dir).get(name)
+    return f'"{digest}"' if digest else None
 
-def enable_template_cache(enabled=True):
-    """Enable or disable template caching globally"""
-    global _cache_enabled
-    _cache_enabled = enabled
 
+def fingerprint_asset_urls(html, asset_dir=ASSET_DIR):
+    """Append ?v=<content hash> to "/assets/<name>" references in a page"""
+    for name, digest in get_asset_hashes(asset_dir).items():
+        html = html.replace(f'"/assets/{name}"', f'"/assets/{name}?v={digest}"')
+    return html
 
-async def serve_static_asset(writer, filepath, cache_control="max-age=300"):
+
+async def send_file(
+    writer, filepath, content_type, cache_control, encoding=None, etag=None
+):
     """
-    Unified static asset serving with caching support
+    Stream a file from flash with Content-Length, reusing one read buffer
 
     Args:
         writer: AsyncIO writer for response
-        filepath: Full path to asset file
+        filepath: Full path to the file to send
+        content_type: Content-Type of the (decoded) asset
         cache_control: Cache control header value
+        encoding: Optional Content-Encoding of the file on disk (e.g. "gzip")
+        etag: Optional ETag header value
+
+    Returns:
+        False if the file doesn't exist, True once sent
     """
+    import os
+
     try:
-        is_binary = is_binary_asset(filepath)
-
-        # Try cached content for text assets
-        if not is_binary:
-            content = load_template(filepath)
-            if content:
-                content_type = get_content_type(filepath)
-                content_bytes = content.encode("utf-8")
-
-                writer.write(
-                    f"HTTP/1.1 200 OK\r\n"
-                    f"Content-Type: {content_type}\r\n"
-                    f"Content-Length: {len(content_bytes)}\r\n"
-                    f"Cache-Control: {cache_control}\r\n\r\n"
-                )
-                await writer.drain()
-                writer.write(content_bytes)
-                await writer.drain()
-                await writer.aclose()
-                return True
+        file_size = os.stat(filepath)[6]
+    except OSError:
+        return False
 
-        # Fallback to file streaming for binary assets or cache miss
-        import os
+    writer.write(_asset_header(content_type, file_size, encoding, etag))
+    writer.write(_cache_control_line(cache_control))
+    buf = bytearray(FILE_CHUNK_SIZE)
+    mv = memoryview(buf)
+    with open(filepath, "rb") as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            writer.write(mv[:n])
+            await writer.drain()
+    return True
 
-        try:
-            stat = os.stat(filepath)
-            file_size = stat[6]
-            content_type = get_content_type(filepath)
-
-            writer.write(
-                f"HTTP/1.1 200 OK\r\n"
-                f"Content-Type: {content_type}\r\n"
-                f"Content-Length: {file_size}\r\n"
-                f"Cache-Control: {cache_control}\r\n\r\n"
+
+def _asset_header(content_type, length, encoding=None, etag=None):
+    # Response head up to (not including) the Cache-Control line
+    extra = f"Content-Encoding: {encoding}\r\n" if encoding else ""
+    if etag:
+        extra += f"ETag: {etag}\r\n"
+    return (
+        f"HTTP/1.1 200 OK\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {length}\r\n"
+        f"{extra}"
+        f"Vary: Accept-Encoding\r\n"
+    ).encode()
+
+
+def _cache_control_line(cache_control):
+    line = _CACHE_CONTROL_LINES.get(cache_control)
+    if line is None:
+        line = f"Cache-Control: {cache_control}\r\n\r\n".encode()
+    return line
+
+
+def _load_asset(key, filepath, content_type, encoding=None, etag=None):
+    """Read an asset into the shared cache as (header bytes, body bytes).
+    None if it is missing, too large to cache or memory is short."""
+    import os
+
+    try:
+        size = os.stat(filepath)[6]
+    except OSError:
+        return None
+    if size > asset_cache.max_entry or memory_low():
+        return None
+    with open(filepath, "rb") as f:
+        body = f.read()
+    entry = (_asset_header(content_type, len(body), encoding, etag), body)
+    if not asset_cache.put(key, entry, len(entry[0]) + len(body)):
+        return None
+    return entry
+
+
+async def _send_asset(
+    writer, filepath, content_type, cache_control, encoding=None, etag=None
+):
+    # From the cache when possible, otherwise streamed from flash
+    key = ("gz:" if encoding else "id:") + filepath
+    entry = asset_cache.get(key)
+    if entry is None:
+        entry = _load_asset(key, filepath, content_type, encoding, etag)
+        if entry is None:
+            return await send_file(
+                writer, filepath, content_type, cache_control, encoding, etag
             )
-            await writer.drain()
+    writer.write(entry[0])
+    writer.write(_cache_control_line(cache_control))
+    writer.write(entry[1])
+    await writer.drain()
+    return True
+
+
+def preload_asset(filepath):
+    """Warm the cache with an asset (and its .gz variant) -> bytes cached"""
+    content_type = get_content_type(filepath)
+    etag = asset_etag(filepath)
+    cached = 0
+    for path, encoding, tag in (
+        (filepath, None, etag),
+        (filepath + ".gz", "gzip", etag[:-1] + '-gz"' if etag else None),
+    ):
+        key = ("gz:" if encoding else "id:") + path
+        entry = asset_cache.get(key) or _load_asset(
+            key, path, content_type, encoding, tag
+        )
+        if entry:
+            cached += len(entry[0]) + len(entry[1])
+    return cached
 
-            with open(filepath, "rb") as f:
-                while True:
-                    chunk = f.read(512)
-                    if not chunk:
-                        break
-                    writer.write(chunk)
-                    await writer.drain()
-                    import uasyncio as asyncio
 
-                    await asyncio.sleep_ms(1)  # Yield to prevent blocking
+def read_template(filepath):
+    """Read a page template from flash (uncached), or None if missing"""
+    try:
+        with open(filepath, "r") as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Template load error {filepath}: {e}")
+        return None
+    if filepath.endswith(".html"):
+        # Pages reference assets by fingerprinted, cache-forever URLs
+        content = fingerprint_asset_urls(content)
+    return content
 
-            await writer.aclose()
-            return True
 
-        except Exception:
-            # File not found or read error
-            return False
+def load_template(filepath):
+    """Load a page template through the shared cache"""
+    content = asset_cache.get(filepath)
+    if content is None:
+        content = read_template(filepath)
+        if content is None:
+            return None
+        asset_cache.put(filepath, content, len(content))
+    return content
+
+
+def clear_template_cache():
+    """Drop cached templates and assets to free memory or reload them"""
+    asset_cache.clear()
+    _asset_hashes.clear()  # Assets may have changed too (e.g. after OTA)
+
+
+async def serve_static_asset(writer, filepath, request=None):
+    """
+    Unified static asset serving with HTTP caching
+
+    Every response carries a content-hash ETag and a matching If-None-Match
+    gets a bodyless 304. Requests for the fingerprinted URL (?v=<hash>, see
+    fingerprint_asset_urls) are cacheable forever; other URLs revalidate.
+
+    Args:
+        writer: AsyncIO writer for response
+        filepath: Full path to asset file
+        request: The Request, for Accept-Encoding, If-None-Match and ?v=
+
+    Returns:
+        False if the asset doesn't exist (caller sends 404), True once handled
+    """
+    headers = request.headers if request else {}
+    try:
+        content_type = get_content_type(filepath)
+        etag = asset_etag(filepath)
+        if etag and request and etag == f'"{request.get_query("v")}"':
+            cache_control = IMMUTABLE_CACHE
+        else:
+            cache_control = REVALIDATE_CACHE
+
+        # Precompressed variant written by tools/build_assets.py; it is a
+        # different representation, so it gets its own ETag
+        if accepts_gzip(headers):
+            gz_etag = etag[:-1] + '-gz"' if etag else None
+            if gz_etag and gz_etag in headers.get("if-none-match", ""):
+                await send_not_modified(writer, gz_etag, cache_control)
+                return True
+            if await _send_asset(
+                writer, filepath + ".gz", content_type, cache_control, "gzip", gz_etag
+            ):
+                return True
+
+        if etag and etag in headers.get("if-none-match", ""):
+            await send_not_modified(writer, etag, cache_control)
+            return True
+        return await _send_asset(
+            writer, filepath, content_type, cache_control, etag=etag
+        )
 
     except Exception as e:
         print(f"Error serving static asset {filepath}: {e}")
         return False
 
 
+async def send_not_modified(writer, etag, cache_control):
+    """Send a 304 Not Modified response (headers only)"""
+    writer.write(
+        f"HTTP/1.1 304 Not Modified\r\n"
+        f"ETag: {etag}\r\n"
+        f"Vary: Accept-Encoding\r\n"
+        f"Cache-Control: {cache_control}\r\n\r\n"
+    )
+    await writer.drain()
+
+
 async def send_404(writer):
     """Send a 404 Not Found response"""
     try:
         writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
         await writer.drain()
-        await writer.aclose()
     except Exception:
         pass
 
@@ -183,7 +381,6 @@ async def send_500(writer, error_msg="Internal Server Error"):
         await writer.drain()
         writer.write(error_bytes)
         await writer.drain()
-        await writer.aclose()
     except Exception:
         pass
 
@@ -198,7 +395,6 @@ async def send_redirect(writer, location, permanent=False):
             f"Content-Length: 0\r\n\r\n".encode()
         )
         await writer.drain()
-        await writer.aclose()
     except Exception:
         pass
 
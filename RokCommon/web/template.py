@@ -0,0 +1,144 @@
+"""
+Precompiled Page Templates for RokCommon
+
+Templates are split once into static byte segments and {{ name }}
+placeholders. Rendering pairs the segments with the request's values and
+writes them straight to the socket, so no full-document string is built
+(or copied once per placeholder) on each request.
+
+Key Features:
+- One parse per template; the compiled form lives in the shared asset cache
+- Content-Length known up front from segment and value lengths
+- Rendered templates can be values of other templates (header/nav in a page)
+- Renders that depend only on config are cached as bytes and dropped as soon
+  as the config changes
+"""
+
+from .asset_cache import asset_cache
+from .static_assets import read_template
+from ..variables.vars_store import get_config_version
+
+# Bytes written before yielding to the event loop to flush the socket
+WRITE_CHUNK_SIZE = 1024
+
+_TEMPLATE_KEY = "tpl:"
+_RENDER_KEY = "out:"
+
+
+class Template:
+    """A template compiled to a list of static segments and placeholders"""
+
+    def __init__(self, source):
+        # bytes for static text, str for a placeholder name
+        parts = []
+        pos = 0
+        while True:
+            start = source.find("{{", pos)
+            if start < 0:
+                break
+            end = source.find("}}", start + 2)
+            if end < 0:
+                break
+            if start > pos:
+                parts.append(source[pos:start].encode())
+            parts.append(source[start + 2 : end].strip())
+            pos = end + 2
+        if pos < len(source):
+            parts.append(source[pos:].encode())
+        self.parts = parts
+        self.size = sum(len(p) for p in parts)
+
+    def render(self, context):
+        """Pair the segments with values -> Rendered. Missing names render
+        empty; values may be str, bytes or another Rendered."""
+        chunks = []
+        length = 0
+        for part in self.parts:
+            if isinstance(part, str):
+                part = _as_chunk(context.get(part, ""))
+            chunks.append(part)
+            length += len(part)
+        return Rendered(chunks, length)
+
+
+class Rendered:
+    """A rendered template as a list of chunks, written without joining"""
+
+    def __init__(self, chunks, length):
+        self.chunks = chunks
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    async def write_to(self, writer):
+        """Write every chunk to the stream, draining about every 1 KB"""
+        await self._write(writer, 0)
+        await writer.drain()
+
+    async def _write(self, writer, pending):
+        for chunk in self.chunks:
+            if isinstance(chunk, Rendered):
+                pending = await chunk._write(writer, pending)
+                continue
+            writer.write(chunk)
+            pending += len(chunk)
+            if pending >= WRITE_CHUNK_SIZE:
+                await writer.drain()
+                pending = 0
+        return pending
+
+    def to_bytes(self):
+        """Join into one buffer (a single allocation), e.g. for caching"""
+        buf = bytearray(self.length)
+        self._copy_into(memoryview(buf), 0)
+        return buf
+
+    def _copy_into(self, mv, pos):
+        for chunk in self.chunks:
+            if isinstance(chunk, Rendered):
+                pos = chunk._copy_into(mv, pos)
+            else:
+                mv[pos : pos + len(chunk)] = chunk
+                pos += len(chunk)
+        return pos
+
+
+def _as_chunk(value):
+    if isinstance(value, (bytes, bytearray, memoryview, Rendered)):
+        return value
+    if not isinstance(value, str):
+        value = str(value)
+    return value.encode()
+
+
+def get_template(*paths):
+    """Compiled template from the first path that loads, or None.
+    Compiled once, then served from the shared asset cache."""
+    for path in paths:
+        key = _TEMPLATE_KEY + path
+        template = asset_cache.get(key)
+        if template is None:
+            source = read_template(path)
+            if source is None:
+                continue
+            template = Template(source)
+            asset_cache.put(key, template, template.size)
+        return template
+    return None
+
+
+def render_cached(key, render):
+    """Bytes of a render that depends only on config, reused until the config
+    changes. render() is called on a miss; results other than a Rendered
+    (e.g. an error page) are returned as-is and not cached."""
+    version = get_config_version()
+    entry = asset_cache.get(_RENDER_KEY + key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    result = render()
+    if not isinstance(result, Rendered):
+        return result
+    data = result.to_bytes()
+    asset_cache.put(_RENDER_KEY + key, (version, data), len(data))
+    return data
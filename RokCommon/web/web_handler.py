@@ -1,215 +1,407 @@
 """
 Unified web server handler for RokCommon
 
-This module provides a simplified web server request handler that works
-with the unified Request/Response system, eliminating complex routing logic.
+This module is the single HTTP/1.1 engine shared by every device web server:
+requests are parsed once, incrementally, straight from the stream and then
+dispatched through a route table.
 
 Key Features:
-- Single async handler function that works with any web server
-- Automatic Request object creation from raw HTTP data
-- Response object handling with chunked transmission
+- Line-by-line request parsing with bounded line, header and body sizes
+- Body reading that honors Content-Length (no socket peeking or retry sleeps)
+- HTTP/1.1 persistent connections with an idle timeout and a request cap
+- Router with exact and prefix routes
+- Lazy page routes: modules imported on first request, rarely used ones
+  unloaded again when memory is needed
+- Page handlers (Request -> Response) and raw stream handlers side by side
 - Legacy page handler support via adapters
 - Memory-efficient processing for ESP32
 """
 
 import uasyncio as asyncio
-import time
 from .request_response import (
     Request,
     Response,
     parse_request_line,
-    parse_headers,
     send_response,
     create_legacy_handler,
 )
 import gc
+import sys
 
 
-async def handle_request(reader, writer, routes, template_loader=None):
+# Parser limits; anything larger is rejected instead of buffered
+MAX_REQUEST_LINE = 1024
+MAX_HEADER_LINE = 512
+MAX_HEADERS = 50
+MAX_BODY = 64 * 1024
+LINE_CHUNK = 128  # Read size while looking for the end of a line
+HEADER_TIMEOUT_S = 10  # Slow or idle clients don't get to hold a slot forever
+
+# Keep-alive: a page load (HTML, JS, CSS, favicon, config) reuses one socket
+# instead of paying a TCP handshake and a GC pass per asset
+KEEPALIVE_IDLE_S = 5
+MAX_REQUESTS_PER_CONNECTION = 20
+
+
+class HTTPError(Exception):
+    """Raised by the parser for requests that get an error status instead of a handler"""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class LazyRoute:
     """
-    Unified request handler that works with any web server setup
+    Page route whose module is imported on its first request
 
-    Args:
-        reader: AsyncIO reader for request data
-        writer: AsyncIO writer for response data
-        routes: Dict mapping paths to page handlers/modules
-        template_loader: Optional function to load templates
+    attr names the module's handler object; without it the module is a
+    legacy page module. Evictable routes are unloaded again by
+    Router.evict(), along with the modules in unload (what the page pulls
+    in that nothing else uses), and re-imported on their next request.
+    """
+
+    def __init__(self, module, attr=None, evictable=False, unload=()):
+        self.module = module
+        self.attr = attr
+        self.evictable = evictable
+        self.modules = (module,) + tuple(unload)
+        self.handler = None
+
+    def load(self):
+        """Handler, importing the module on first use"""
+        if self.handler is None:
+            __import__(self.module)
+            module = sys.modules[self.module]
+            if self.attr:
+                self.handler = getattr(module, self.attr)
+            else:
+                self.handler = create_legacy_handler(module)
+            print(f"Loaded {self.module}")
+        return self.handler
+
+    def unload(self):
+        """Drop the handler and its modules -> True if they were loaded"""
+        if self.handler is None:
+            return False
+        self.handler = None
+        for name in self.modules:
+            if sys.modules.pop(name, None) is None:
+                continue
+            # The parent package keeps a reference too
+            parent, _, child = name.rpartition(".")
+            package = sys.modules.get(parent)
+            if package is not None:
+                try:
+                    delattr(package, child)
+                except (AttributeError, TypeError):
+                    pass
+        print(f"Unloaded {self.module}")
+        return True
+
+
+class Router:
+    """
+    Route table for the HTTP engine
+
+    Exact routes are a dict lookup; prefix routes are checked longest first.
+    Page handlers take a Request and return a Response. Raw handlers are
+    coroutines called as handler(request, reader, writer) and write their own
+    response (static files, WebSocket upgrades, streaming).
+    """
+
+    def __init__(self, routes=None, on_request=None):
+        self.exact = {}
+        self.prefixes = []
+        self.lazy = []
+        self.on_request = on_request  # Optional hook, called with each Request
+        for path, handler in (routes or {}).items():
+            self.add(path, handler)
+
+    def add(self, path, handler, prefix=False, raw=False):
+        if isinstance(handler, LazyRoute):
+            self.lazy.append(handler)
+        elif not raw and not hasattr(handler, "handle"):
+            # Wrap legacy page modules once, not on every request
+            handler = create_legacy_handler(handler)
+        if prefix:
+            self.prefixes.append((path, handler, raw))
+            self.prefixes.sort(key=lambda r: len(r[0]), reverse=True)
+        else:
+            self.exact[path] = (handler, raw)
+
+    def match(self, path):
+        """Find the handler for a path -> (handler, raw), (None, False) if none"""
+        route = self.exact.get(path)
+        if not route:
+            for prefix, handler, raw in self.prefixes:
+                if path.startswith(prefix):
+                    route = handler, raw
+                    break
+            else:
+                return None, False
+        handler, raw = route
+        if isinstance(handler, LazyRoute):
+            return handler.load(), raw
+        return route
+
+    def evict(self):
+        """Unload every evictable lazy route -> number unloaded. For when the
+        heap runs low or a memory-hungry session (e.g. driving) starts."""
+        count = 0
+        for route in self.lazy:
+            if route.evictable and route.unload():
+                count += 1
+        if count:
+            gc.collect()
+        return count
+
+
+class BufferedReader:
+    """
+    Connection reader with a size-capped readline()
+
+    uasyncio's readline() buffers until it sees a newline, however long the
+    line gets. Here lines are read in LINE_CHUNK pieces and rejected as soon
+    as they pass the limit; bytes read past the end of a line are kept and
+    handed out first by read(), readinto() and readexactly(), so body
+    parsers and raw handlers use this in place of the stream reader.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._buf = b""
+        self._readinto = getattr(reader, "readinto", None)
+
+    async def readline(self, limit):
+        """Next line, newline included (b"" at EOF); HTTPError past limit"""
+        buf = self._buf
+        start = 0
+        while True:
+            end = buf.find(b"\n", start) + 1
+            if end:
+                self._buf = buf[end:]
+                buf = buf[:end]
+                break
+            if len(buf) > limit:
+                break
+            start = len(buf)
+            chunk = await self.reader.read(LINE_CHUNK)
+            if not chunk:
+                self._buf = b""
+                return buf  # Client closed mid-line
+            buf += chunk
+        if len(buf) > limit:
+            self._buf = b""
+            raise HTTPError("431 Request Header Fields Too Large")
+        return buf
+
+    def _take(self, n):
+        data = self._buf[:n]
+        self._buf = self._buf[n:]
+        return data
+
+    async def read(self, n=-1):
+        if self._buf:
+            return self._take(len(self._buf) if n < 0 else n)
+        return await self.reader.read(n)
+
+    async def readinto(self, buf):
+        if self._buf:
+            data = self._take(len(buf))
+            buf[: len(data)] = data
+            return len(data)
+        if self._readinto:
+            return await self._readinto(buf)
+        data = await self.reader.read(len(buf))
+        buf[: len(data)] = data
+        return len(data)
+
+    async def readexactly(self, n):
+        data = self._take(n)
+        if len(data) < n:
+            data += await self.reader.readexactly(n - len(data))
+        return data
+
+
+async def read_request(reader):
+    """
+    Parse one request from the stream (a BufferedReader)
 
     Returns:
-        None (handles response directly)
+        Request with the body already read, or None if the client closed the
+        connection before sending a request line
+
+    Raises:
+        HTTPError for malformed or oversized requests
     """
-    client_ip = "unknown"
-    print(f"[TRACE] handle_request called")
+    line = await reader.readline(MAX_REQUEST_LINE)
+    if not line:
+        return None
     try:
-        # Get client IP for logging
+        line = line.decode()
+    except Exception:
+        raise HTTPError("400 Bad Request")
+
+    method, path, query_string = parse_request_line(line)
+    if not method or not path or line.startswith("PRI * HTTP/2"):
+        raise HTTPError("400 Bad Request")
+    parts = line.split()
+    version = parts[2] if len(parts) > 2 else "HTTP/1.0"
+
+    headers = {}
+    content_type = ""
+    while True:
+        hdr = await reader.readline(MAX_HEADER_LINE)
+        if not hdr or hdr == b"\r\n" or hdr == b"\n":
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError("431 Request Header Fields Too Large")
         try:
-            client_ip = (
-                writer.get_extra_info("peername")[0]
-                if hasattr(writer, "get_extra_info")
-                else "unknown"
-            )
+            k, v = hdr.decode().split(":", 1)
         except Exception:
-            pass
+            continue  # Skip undecodable or colon-less lines
+        k = k.strip().lower()
+        headers[k] = v.strip()
+        if k == "content-type":
+            content_type = headers[k]
 
-        print(f"[TRACE] Reading request line from {client_ip}")
-        # WORKAROUND: Try to access underlying socket directly
-        try:
-            # Get the underlying socket from the asyncio stream
-            sock = writer.get_extra_info("socket")
-            if sock:
-                print(f"[TRACE] Got underlying socket, trying direct recv")
-                # Set socket to non-blocking mode and try direct recv
-                try:
-                    sock.setblocking(False)
-                    raw_data = sock.recv(1024)
-                    if raw_data:
-                        print(f"[TRACE] Got {len(raw_data)} bytes via direct socket")
-                    else:
-                        print(f"[TRACE] No data from direct socket recv")
-                        # Try with a small delay and retry
-                        await asyncio.sleep(0.1)
-                        raw_data = sock.recv(1024)
-                        if raw_data:
-                            print(f"[TRACE] Got {len(raw_data)} bytes on retry")
-                        else:
-                            print(f"[TRACE] Still no data, closing")
-                            await writer.aclose()
-                            return
-                except OSError as e:
-                    print(f"[TRACE] Direct socket recv failed: {e}")
-                    # Fall back to asyncio with extended timeout
-                    print(f"[TRACE] Falling back to asyncio read with 10s timeout")
-                    try:
-                        raw_data = await asyncio.wait_for(
-                            reader.read(1024), timeout=10.0
-                        )
-                        if not raw_data:
-                            print(f"[TRACE] No data from asyncio fallback, closing")
-                            await writer.aclose()
-                            return
-                        print(
-                            f"[TRACE] Got {len(raw_data)} bytes from asyncio fallback"
-                        )
-                    except asyncio.TimeoutError:
-                        print(f"[TRACE] Asyncio fallback timeout, closing")
-                        await writer.aclose()
-                        return
-            else:
-                print(f"[TRACE] No underlying socket available")
-                await writer.aclose()
-                return
-        except Exception as e:
-            print(f"[TRACE] Socket access error: {e}, closing")
-            await writer.aclose()
-            return
+    try:
+        content_length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError("400 Bad Request")
+
+    request = Request(
+        method=method,
+        path=path,
+        query_string=query_string,
+        headers=headers,
+        content_type=content_type,
+    )
+    if content_length > 0:
+        request.body_pending = content_length
+        if "multipart/form-data" not in content_type:
+            await read_body(request, reader)
+        # Multipart bodies stay on the socket until dispatch: upload handlers
+        # parse them as they arrive instead of buffering them here
+    request.version = version
+    # HTTP/1.1 persists unless the client opts out; HTTP/1.0 only if it opts in
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.1":
+        request.keep_alive = "close" not in connection
+    else:
+        request.keep_alive = "keep-alive" in connection
+    return request
+
+
+async def read_body(request, reader):
+    """Read a pending request body into request.body (str, or bytes if binary)"""
+    if request.body_pending > MAX_BODY:
+        raise HTTPError("413 Payload Too Large")
+    body = await reader.readexactly(request.body_pending)
+    request.body_pending = 0
+    try:
+        body = body.decode("utf-8")
+    except Exception:
+        pass  # Binary body; handlers get bytes
+    request.set_body(body)
 
-        if not raw_data:
-            print(f"[TRACE] No raw data received, closing")
-            await writer.aclose()
-            return
 
-        print(f"[TRACE] Processing raw data: {len(raw_data)} bytes")
+async def dispatch(request, reader, writer, router):
+    """
+    Route a parsed request and send the handler's response
 
-        # Find the first line (request line)
-        try:
-            data_str = raw_data.decode("utf-8", errors="ignore")
-            lines = data_str.split("\n")
-            if not lines or not lines[0].strip():
-                print(f"[TRACE] No valid request line in raw data, closing")
-                await writer.aclose()
-                return
+    Raw handlers must send a Content-Length (or clear request.keep_alive when
+    they take the connection over, e.g. WebSocket upgrades) so the next
+    request on the connection can be parsed.
 
-            line = lines[0].strip().rstrip("\r")
-            print(f"[TRACE] Extracted request line: {line}")
-        except Exception as e:
-            print(f"[TRACE] Error processing raw data: {e}, closing")
-            await writer.aclose()
-            return
+    Multipart bodies go unread to page handlers with an async
+    handle_upload(request, reader), which must consume them and keep
+    request.body_pending up to date; everyone else gets them buffered.
+    """
+    if router.on_request:
+        router.on_request(request)
 
-        # Handle HTTP/2 probes and malformed requests
-        if line.startswith("PRI * HTTP/2.0") or not line:
-            print(f"[TRACE] HTTP/2 or empty request, closing")
-            await writer.aclose()
+    handler, raw = router.match(request.path)
+    upload = request.body_pending and hasattr(handler, "handle_upload")
+    if request.body_pending and not upload:
+        # Buffered like any other body (within MAX_BODY)
+        try:
+            await read_body(request, reader)
+        except HTTPError as e:
+            response = Response(status=e.status, body=e.status)
+            await send_response(writer, response, False)
+            request.keep_alive = False
             return
 
-        # Parse request line
-        print(f"[TRACE] Parsing request line")
-        method, path, query_string = parse_request_line(line)
-        if not method or not path:
-            print(f"[TRACE] Parse failed, closing")
-            await writer.aclose()
-            return
+    if raw:
+        await handler(request, reader, writer)
+        return
+
+    if upload:
+        response = await handler.handle_upload(request, reader)
+        if request.body_pending:
+            request.keep_alive = False  # Upload abandoned mid-body
+    elif handler:
+        response = handler.handle(request)
+        # Ensure we got a Response object
+        if not isinstance(response, Response):
+            response = Response.server_error("Invalid handler response")
+    else:
+        response = Response.not_found(f"Path {request.path} not found")
+    if not await send_response(
+        writer, response, request.keep_alive, request.version == "HTTP/1.1"
+    ):
+        request.keep_alive = False  # Body ran to close, or the send failed
 
-        print(f"[TRACE] Parsed: {method} {path}")
 
-        # Read headers from the remaining raw data
-        print(f"[TRACE] Parsing headers from raw data")
-        header_lines = []
-        if len(lines) > 1:
-            # Skip the request line (lines[0]), process headers
-            for i in range(1, len(lines)):
-                line_data = lines[i].strip().rstrip("\r")
-                if not line_data:  # Empty line = end of headers
-                    break
-                if line_data and ":" in line_data:
-                    header_lines.append(line_data.encode("utf-8"))
-
-        print(f"[TRACE] Got {len(header_lines)} headers from raw data")
-        headers, content_type = parse_headers(header_lines)
-
-        # Read body for POST requests
-        body = ""
-        if method == "POST":
-            content_length = int(headers.get("content-length", 0))
-            if content_length > 0:
-                body_bytes = await reader.read(content_length)
-                body = (
-                    body_bytes.decode("utf-8")
-                    if isinstance(body_bytes, bytes)
-                    else str(body_bytes)
-                )
-
-        print(f"[TRACE] Creating Request object")
-        # Create unified Request object
-        request = Request(
-            method=method,
-            path=path,
-            query_string=query_string,
-            body=body,
-            headers=headers,
-            content_type=content_type,
-        )
+async def handle_request(reader, writer, routes, template_loader=None):
+    """
+    Unified request handler that works with any web server setup
 
-        # Yield control to prevent blocking
-        await asyncio.sleep(0)
+    Args:
+        reader: AsyncIO reader for request data
+        writer: AsyncIO writer for response data
+        routes: Router, or dict mapping paths to page handlers/modules
+        template_loader: Unused, kept for call compatibility
 
-        print(f"[TRACE] Looking up route for {path}")
-        # Route to page handler
-        page_handler = routes.get(path)
-        if page_handler:
-            print(f"[TRACE] Found handler, creating adapter if needed")
-            # Create legacy adapter if needed
-            if not hasattr(page_handler, "handle"):
-                page_handler = create_legacy_handler(page_handler)
+    Returns:
+        None (handles response directly)
+    """
+    router = routes if isinstance(routes, Router) else Router(routes)
+    reader = BufferedReader(reader)
+    client_ip = "unknown"
+    try:
+        # Get client IP for logging
+        try:
+            client_ip = writer.get_extra_info("peername")[0]
+        except Exception:
+            pass
 
-            print(f"[TRACE] Calling handler")
-            response = page_handler.handle(request)
-            print(f"[TRACE] Handler returned: {type(response)}")
+        # Request loop: one connection serves requests until the client
+        # closes it, goes idle, opts out of keep-alive or hits the cap
+        timeout = HEADER_TIMEOUT_S
+        served = 0
+        while True:
+            try:
+                request = await asyncio.wait_for(read_request(reader), timeout)
+            except HTTPError as e:
+                response = Response(status=e.status, body=e.status)
+                await send_response(writer, response, False)
+                return
+            except asyncio.TimeoutError:
+                return
+            if request is None:
+                return
 
-            # Ensure we got a Response object
-            if not isinstance(response, Response):
-                print(f"[TRACE] Invalid response type, creating error")
-                response = Response.server_error("Invalid handler response")
+            served += 1
+            if served >= MAX_REQUESTS_PER_CONNECTION:
+                request.keep_alive = False
 
-            print(f"[TRACE] Sending response")
-            await send_response(writer, response)
-            print(f"[TRACE] Response sent successfully")
-        else:
-            print(f"[TRACE] No handler found, sending 404")
-            # 404 for unknown paths
-            response = Response.not_found(f"Path {path} not found")
-            await send_response(writer, response)
-            print(f"[TRACE] 404 sent successfully")
+            await dispatch(request, reader, writer, router)
+            if not request.keep_alive:
+                return
+            timeout = KEEPALIVE_IDLE_S
 
     except OSError as e:
         if getattr(e, "errno", None) == 104:  # ECONNRESET
@@ -229,7 +421,7 @@ async def handle_request(reader, writer, routes, template_loader=None):
         except Exception:
             pass
 
-        # Help garbage collection
+        # Help garbage collection, once per connection rather than per request
         gc.collect()
 
 
@@ -242,7 +434,7 @@ class UnifiedWebServer:
     """
 
     def __init__(self, routes, host="0.0.0.0", port=80, template_loader=None):
-        self.routes = routes
+        self.routes = routes if isinstance(routes, Router) else Router(routes)
         self.host = host
         self.port = port
         self.template_loader = template_loader
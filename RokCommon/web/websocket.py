@@ -0,0 +1,233 @@
+"""
+Shared WebSocket Frame Codec for RokCommon
+
+Server side of RFC 6455 for uasyncio streams:
+- Exact-length reads into a preallocated buffer (no per-frame allocations)
+- In-place unmasking of client payloads
+- Fragmented messages reassembled into the same buffer
+- Ping/pong answered and close echoed inside recv()
+
+Payloads returned by recv() are memoryviews into the connection's buffer and
+are only valid until the next recv() call.
+"""
+
+import hashlib
+
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Opcodes
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+# Close status codes
+CLOSE_NORMAL = 1000
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_TOO_BIG = 1009
+
+# Control frames never carry more than 125 bytes
+MAX_CONTROL_PAYLOAD = 125
+DEFAULT_MAX_MESSAGE = 1024
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    sha = hashlib.sha1((key + WS_GUID).encode())
+    return binascii.b2a_base64(sha.digest()).decode().strip()
+
+
+if micropython:
+
+    @micropython.viper
+    def _unmask(buf: ptr8, start: int, length: int, mask: ptr8):
+        for i in range(length):
+            buf[start + i] = buf[start + i] ^ mask[i & 3]
+
+else:
+
+    def _unmask(buf, start, length, mask):
+        for i in range(length):
+            buf[start + i] ^= mask[i & 3]
+
+
+class WebSocket:
+    """One server-side WebSocket connection over a uasyncio reader/writer pair"""
+
+    def __init__(self, reader, writer, max_message=DEFAULT_MAX_MESSAGE):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        # Message buffer, frame header scratch, mask key and control payloads
+        # are allocated once per connection and reused for every frame
+        self._buf = bytearray(max_message)
+        self._mv = memoryview(self._buf)
+        self._hdr = bytearray(8)
+        self._hdr_mv = memoryview(self._hdr)
+        self._out_hdr = bytearray(10)  # Separate so sends can't clobber a read
+        self._out_hdr_mv = memoryview(self._out_hdr)
+        self._mask = bytearray(4)
+        self._mask_mv = memoryview(self._mask)
+        self._ctrl = bytearray(MAX_CONTROL_PAYLOAD)
+        self._ctrl_mv = memoryview(self._ctrl)
+        self._readinto = getattr(reader, "readinto", None)
+
+    async def _read_exact(self, mv):
+        # StreamReader.read()/readinto() may return short; loop until full
+        n = len(mv)
+        pos = 0
+        while pos < n:
+            if self._readinto:
+                got = await self._readinto(mv[pos:])
+            else:
+                chunk = await self.reader.read(n - pos)
+                got = len(chunk) if chunk else 0
+                mv[pos : pos + got] = chunk
+            if not got:
+                raise EOFError
+            pos += got
+
+    async def _read_frame_header(self):
+        # -> (fin, opcode, payload length, masked); mask key left in self._mask
+        hdr = self._hdr_mv
+        await self._read_exact(hdr[:2])
+        b1 = self._hdr[0]
+        b2 = self._hdr[1]
+        length = b2 & 0x7F
+        if length == 126:
+            await self._read_exact(hdr[:2])
+            length = (self._hdr[0] << 8) | self._hdr[1]
+        elif length == 127:
+            await self._read_exact(hdr[:8])
+            length = 0
+            for i in range(8):
+                length = (length << 8) | self._hdr[i]
+        masked = bool(b2 & 0x80)
+        if masked:
+            await self._read_exact(self._mask_mv)
+        return bool(b1 & 0x80), b1 & 0x0F, length, masked
+
+    async def _discard(self, length):
+        # Drain a payload we refuse to buffer so the stream stays in sync
+        while length:
+            n = min(length, len(self._buf))
+            await self._read_exact(self._mv[:n])
+            length -= n
+
+    async def recv(self):
+        """Next complete data message -> (opcode, memoryview), None once closed.
+        Control frames are handled here and never returned."""
+        size = 0
+        msg_opcode = None
+        try:
+            while True:
+                fin, opcode, length, masked = await self._read_frame_header()
+
+                if opcode >= OP_CLOSE:
+                    if not fin or length > MAX_CONTROL_PAYLOAD:
+                        await self.close(CLOSE_PROTOCOL_ERROR)
+                        return None
+                    payload = self._ctrl_mv[:length]
+                    await self._read_exact(payload)
+                    if masked:
+                        _unmask(self._ctrl, 0, length, self._mask)
+                    if opcode == OP_PING:
+                        await self.send(OP_PONG, payload)
+                    elif opcode == OP_CLOSE:
+                        # Echo the peer's status code back, then stop
+                        await self.close(
+                            (self._ctrl[0] << 8) | self._ctrl[1]
+                            if length >= 2
+                            else CLOSE_NORMAL
+                        )
+                        return None
+                    continue  # Pong or ping handled; keep reading
+
+                if opcode == OP_CONT:
+                    if msg_opcode is None:
+                        await self.close(CLOSE_PROTOCOL_ERROR)
+                        return None
+                elif msg_opcode is not None or opcode not in (OP_TEXT, OP_BINARY):
+                    # New data frame in the middle of a fragmented message
+                    await self.close(CLOSE_PROTOCOL_ERROR)
+                    return None
+                else:
+                    msg_opcode = opcode
+
+                if size + length > len(self._buf):
+                    await self._discard(length)
+                    await self.close(CLOSE_TOO_BIG)
+                    return None
+                await self._read_exact(self._mv[size : size + length])
+                if masked:
+                    _unmask(self._buf, size, length, self._mask)
+                size += length
+
+                if fin:
+                    return msg_opcode, self._mv[:size]
+        except (EOFError, OSError):
+            await self._abort()
+            return None
+
+    async def send(self, opcode, payload):
+        """Send one unfragmented frame (server frames are never masked)"""
+        if self.closed:
+            return
+        length = len(payload)
+        hdr = self._out_hdr
+        hdr[0] = 0x80 | opcode
+        if length < 126:
+            hdr[1] = length
+            n = 2
+        elif length < 0x10000:
+            hdr[1] = 126
+            hdr[2] = length >> 8
+            hdr[3] = length & 0xFF
+            n = 4
+        else:
+            hdr[1] = 127
+            for i in range(8):
+                hdr[9 - i] = (length >> (8 * i)) & 0xFF
+            n = 10
+        try:
+            self.writer.write(self._out_hdr_mv[:n])
+            if length:
+                self.writer.write(payload)
+            await self.writer.drain()
+        except OSError:
+            await self._abort()
+
+    async def send_text(self, text):
+        await self.send(OP_TEXT, text.encode())
+
+    async def close(self, code=CLOSE_NORMAL):
+        """Send a close frame (once) and close the underlying stream"""
+        if self.closed:
+            return
+        self._ctrl[0] = code >> 8
+        self._ctrl[1] = code & 0xFF
+        await self.send(OP_CLOSE, self._ctrl_mv[:2])
+        await self._abort()
+
+    async def _abort(self):
+        # Drop the connection without a closing handshake
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self.writer.aclose()
+        except Exception:
+            pass
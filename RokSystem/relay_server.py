@@ -4,6 +4,7 @@
 # - Proxies HTTP and WebSocket requests to vehicles on the LAN
 # - Exposes a single public port for all vehicles
 # - Enforces per-client and per-vehicle rate limits
+# - Discovers vehicles and cameras from UDP beacons and a background subnet sweep
 
 
 import asyncio
@@ -11,13 +12,36 @@ import websockets
 import aiohttp
 from aiohttp import web
 import json
+import re
 import time
 import ssl
 
 # --- Config ---
 RELAY_PORT = 443  # Now using HTTPS/WSS
 VEHICLE_PORT = 80  # ESP32 HTTP/WS port
+CAM_STREAM_PORT = 8081  # RokVision MJPEG stream port
 RATE_LIMIT_MS = 30  # Minimum ms between control updates per client
+VEHICLE_MAX_CONNECTIONS = 2  # Max open sockets per vehicle (ESP32 socket table is tiny)
+VEHICLE_IDLE_TIMEOUT_S = 15  # Close idle keep-alive connections to a vehicle after this
+VEHICLE_REQUEST_TIMEOUT_S = 5  # Give up on a proxied request after this
+
+# Per-path cache rules for proxied GETs: path -> TTL in ms. Paths not listed are
+# still coalesced (concurrent identical GETs share one upstream request) but
+# never served from cache.
+API_CACHE_TTL_MS = {
+    'status': 500,
+    'api/status': 500,
+}
+
+# Fleet discovery: background subnet sweep replacing per-browser scans
+SCAN_SUBNETS = []  # e.g. ['192.168.11']; subnets requested by clients are added at runtime
+MAX_SCAN_SUBNETS = 4  # Cap on swept subnets (254 probes each per sweep)
+SCAN_INTERVAL_S = 10  # Seconds between sweeps
+SCAN_CONCURRENCY = 32  # Max probes in flight at once
+SCAN_TIMEOUT_S = 0.8  # Per-probe timeout
+FLEET_EXPIRY_S = 30  # Drop devices not seen for this long
+BEACON_PORT = 47800  # UDP port devices broadcast their beacons to
+BEACON_MAGIC = 'ROK1'  # Beacon format: ROK1|tag|type|project|busy|ip|stream_port
 
 # --- Vehicle registry (tag -> IP) ---
 vehicle_registry = {}  # e.g. {'loader-123ABC': '192.168.11.42'}
@@ -37,6 +61,61 @@ async def handle_static(request):
     except Exception:
         return web.Response(status=404, text='Not found')
 
+# --- Upstream connection pool (one long-lived session per vehicle IP) ---
+def get_vehicle_session(app, ip):
+    sessions = app['vehicle_sessions']
+    session = sessions.get(ip)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=VEHICLE_MAX_CONNECTIONS,
+            keepalive_timeout=VEHICLE_IDLE_TIMEOUT_S,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=VEHICLE_REQUEST_TIMEOUT_S),
+        )
+        sessions[ip] = session
+    return session
+
+async def init_vehicle_sessions(app):
+    app['vehicle_sessions'] = {}
+
+async def close_vehicle_sessions(app):
+    sessions = app['vehicle_sessions']
+    for session in sessions.values():
+        await session.close()
+    sessions.clear()
+
+# --- Single-flight + short-TTL cache for proxied GETs ---
+api_cache = {}  # (ip, path, query) -> (expires_ms, (status, content_type, body))
+api_inflight = {}  # (ip, path, query) -> asyncio.Task shared by all waiters
+
+async def fetch_upstream(session, method, url, params=None):
+    async with session.request(method, url, params=params) as resp:
+        data = await resp.read()
+        return resp.status, resp.content_type, data
+
+async def fetch_and_cache(session, key, url, params):
+    result = await fetch_upstream(session, 'GET', url, params)
+    ttl_ms = API_CACHE_TTL_MS.get(key[1], 0)
+    if ttl_ms and result[0] == 200:
+        api_cache[key] = (time.monotonic() * 1000 + ttl_ms, result)
+    return result
+
+async def fetch_coalesced(session, key, url, params):
+    cached = api_cache.get(key)
+    if cached:
+        if cached[0] > time.monotonic() * 1000:
+            return cached[1]
+        del api_cache[key]
+    task = api_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_and_cache(session, key, url, params))
+        api_inflight[key] = task
+        task.add_done_callback(lambda t: api_inflight.pop(key, None))
+    # Shield so one client disconnecting doesn't cancel the request for everyone
+    return await asyncio.shield(task)
+
 # --- HTTP proxy for /status and other endpoints ---
 async def handle_api(request):
     tag = request.match_info['tag']
@@ -45,12 +124,50 @@ async def handle_api(request):
     if not ip:
         return web.Response(status=404, text='Vehicle not found')
     url = f'http://{ip}:{VEHICLE_PORT}/{path}'
-    async with aiohttp.ClientSession() as session:
-        async with session.request(request.method, url, params=request.query) as resp:
-            data = await resp.read()
-            return web.Response(body=data, status=resp.status, content_type=resp.content_type)
+    session = get_vehicle_session(request.app, ip)
+    try:
+        if request.method == 'GET':
+            key = (ip, path, request.query_string)
+            status, content_type, data = await fetch_coalesced(session, key, url, request.query)
+        else:
+            status, content_type, data = await fetch_upstream(session, request.method, url, request.query)
+        return web.Response(body=data, status=status, content_type=content_type)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return web.Response(status=502, text='Vehicle unreachable')
 
 # --- WebSocket relay ---
+PRIORITY_ACTIONS = ('stop', 'stop_all')  # Bypass the mailbox and go out immediately
+BATCH_SLOT = '*batch'  # Mailbox slot shared by all batch messages
+
+def control_slot(data):
+    """Classify a client control message -> (is_priority, mailbox slot name)"""
+    try:
+        pkt = json.loads(data)
+    except (TypeError, ValueError):
+        return False, None
+    if not isinstance(pkt, dict):
+        return False, None
+    if pkt.get('action') in PRIORITY_ACTIONS:
+        return True, pkt.get('name')
+    if pkt.get('action') == 'batch':
+        # A batch carries the whole control state; the newest one wins
+        return False, BATCH_SLOT
+    # Motors are keyed by name, logic functions by id
+    return False, pkt.get('name', pkt.get('id'))
+
+def stop_in_batch(data, name):
+    """A pending batch message with motor `name` set to 0 (stopped); the
+    other controls keep their latest values"""
+    try:
+        pkt = json.loads(data)
+    except (TypeError, ValueError):
+        return data
+    motors = pkt.get('motors') if isinstance(pkt, dict) else None
+    if not isinstance(motors, dict) or name not in motors:
+        return data
+    motors[name] = 0
+    return json.dumps(pkt)
+
 async def handle_ws(request):
     tag = request.match_info['tag']
     ip = vehicle_registry.get(tag)
@@ -62,23 +179,396 @@ async def handle_ws(request):
     uri = f'ws://{ip}:{VEHICLE_PORT}/ws'
     try:
         async with websockets.connect(uri) as ws_vehicle:
-            last_sent = 0
+            # Latest-value mailbox: one pending message per control, flushed at
+            # most once per RATE_LIMIT_MS. Newer values overwrite older ones so
+            # the final state of every control always reaches the vehicle.
+            # Stops queue in `urgent` and jump the rate limit. One task does
+            # all sending, and takes each value out of the mailbox only as it
+            # sends it, so a stop can never be overtaken by a value it dropped.
+            pending = {}
+            urgent = []
+            wake = asyncio.Event()
+
+            async def flush_to_vehicle():
+                loop = asyncio.get_running_loop()
+                next_round = 0
+                while True:
+                    if not (urgent or pending):
+                        await wake.wait()
+                        wake.clear()
+                    while urgent:
+                        await ws_vehicle.send(urgent.pop(0))
+                    if not pending:
+                        continue
+                    wait = next_round - loop.time()
+                    if wait > 0:
+                        # Rate limited; a stop arriving meanwhile still goes at once
+                        wake.clear()
+                        try:
+                            await asyncio.wait_for(wake.wait(), wait)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    next_round = loop.time() + RATE_LIMIT_MS / 1000
+                    for _ in range(len(pending)):
+                        if urgent or not pending:
+                            break  # Stop first; what it left waits for the next round
+                        slot = next(iter(pending))
+                        await ws_vehicle.send(pending.pop(slot))
+
             async def relay_to_vehicle():
-                nonlocal last_sent
                 async for msg in ws_client:
-                    now = time.time() * 1000
-                    if now - last_sent < RATE_LIMIT_MS:
-                        continue  # rate limit
-                    last_sent = now
-                    await ws_vehicle.send(msg.data)
+                    priority, slot = control_slot(msg.data)
+                    if priority:
+                        # Drop stale values the stop supersedes; it goes next
+                        if slot is None:
+                            pending.clear()
+                        else:
+                            pending.pop(slot, None)
+                            if BATCH_SLOT in pending:
+                                pending[BATCH_SLOT] = stop_in_batch(pending[BATCH_SLOT], slot)
+                        urgent.append(msg.data)
+                    else:
+                        pending[slot] = msg.data
+                    wake.set()
             async def relay_to_client():
                 async for msg in ws_vehicle:
                     await ws_client.send_str(msg)
-            await asyncio.gather(relay_to_vehicle(), relay_to_client())
-    except Exception as e:
-        await ws_client.close()
+            # The session ends as soon as the client, the vehicle or the
+            # flusher does; a failed send is re-raised here rather than
+            # leaving a mailbox nobody drains
+            tasks = [asyncio.ensure_future(coro) for coro in
+                     (relay_to_vehicle(), relay_to_client(), flush_to_vehicle())]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+            for task in done:
+                task.result()
+    except Exception:
+        pass  # Vehicle unreachable or gone; the client is closed below
+    await ws_client.close()
     return ws_client
 
+# --- MJPEG fan-out (one upstream connection per camera, any number of viewers) ---
+async def read_mjpeg_frame(reader):
+    """Read the next part of a multipart/x-mixed-replace stream -> JPEG bytes, None at EOF"""
+    length = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            if length is not None:
+                break  # End of part headers
+            continue  # CRLF trailing the previous part
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    return await reader.readexactly(length)
+
+class MjpegFanout:
+    """Shares one upstream camera stream between all downstream viewers"""
+
+    def __init__(self, ip, port=CAM_STREAM_PORT):
+        self.ip = ip
+        self.port = port
+        self.viewers = set()  # One single-slot queue per viewer
+        self.task = None
+
+    def add_viewer(self):
+        queue = asyncio.Queue(maxsize=1)
+        self.viewers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._pump())
+        return queue
+
+    def remove_viewer(self, queue):
+        self.viewers.discard(queue)
+        if not self.viewers and self.task:
+            # Last viewer left, release the camera
+            self.task.cancel()
+            self.task = None
+
+    def _publish(self, frame):
+        for queue in self.viewers:
+            if queue.full():
+                queue.get_nowait()  # Slow viewer: drop the stale frame, never queue up
+            queue.put_nowait(frame)
+
+    async def _pump(self):
+        url = f'http://{self.ip}:{self.port}/stream'
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=VEHICLE_REQUEST_TIMEOUT_S,
+                                        sock_read=VEHICLE_REQUEST_TIMEOUT_S)
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(url) as resp:
+                    while True:
+                        frame = await read_mjpeg_frame(resp.content)
+                        if frame is None:
+                            break
+                        self._publish(frame)
+        except (aiohttp.ClientError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            # Tell any remaining viewers the stream has ended
+            self._publish(None)
+
+async def init_mjpeg_fanouts(app):
+    app['mjpeg_fanouts'] = {}
+
+async def close_mjpeg_fanouts(app):
+    for fanout in app['mjpeg_fanouts'].values():
+        if fanout.task:
+            fanout.task.cancel()
+    app['mjpeg_fanouts'].clear()
+
+async def handle_stream(request):
+    tag = request.match_info['tag']
+    ip = vehicle_registry.get(tag)
+    if not ip:
+        return web.Response(status=404, text='Camera not found')
+    fanouts = request.app['mjpeg_fanouts']
+    fanout = fanouts.get(ip)
+    if fanout is None:
+        dev = request.app['discovery'].devices.get(tag, {})
+        fanout = fanouts[ip] = MjpegFanout(ip, dev.get('stream_port') or CAM_STREAM_PORT)
+    queue = fanout.add_viewer()
+    resp = web.StreamResponse(headers={
+        'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+        'Cache-Control': 'no-store',
+    })
+    try:
+        await resp.prepare(request)
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                break
+            await resp.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % len(frame))
+            await resp.write(frame)
+            await resp.write(b'\r\n')
+    except ConnectionResetError:
+        pass  # Viewer went away
+    finally:
+        fanout.remove_viewer(queue)
+        if not fanout.viewers and fanouts.get(ip) is fanout:
+            del fanouts[ip]
+    return resp
+
+# --- Fleet discovery ---
+SUBNET_RE = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}$')
+FLEET_CHANGE_FIELDS = ('ip', 'type', 'project', 'busy', 'stream_port')
+
+class FleetDiscovery:
+    """Sweeps the configured subnets in the background and keeps a fleet table"""
+
+    def __init__(self):
+        self.subnets = set(SCAN_SUBNETS)
+        self.devices = {}  # tag -> {tag, ip, type, project, busy, last_seen}
+        self.subscribers = set()  # One single-slot change queue per push client
+        self.session = None
+        self.task = None
+        self.kick = None
+        self.limit = None
+
+    async def start(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=SCAN_CONCURRENCY),
+            timeout=aiohttp.ClientTimeout(total=SCAN_TIMEOUT_S),
+        )
+        self.kick = asyncio.Event()
+        self.limit = asyncio.Semaphore(SCAN_CONCURRENCY)
+        self.task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self.task.cancel()
+        await self.session.close()
+
+    def add_subnet(self, subnet):
+        if not SUBNET_RE.match(subnet):
+            return
+        octets = [int(o) for o in subnet.split('.')]
+        if max(octets) > 255:
+            return
+        subnet = '.'.join(map(str, octets))  # '192.168.011' is '192.168.11'
+        if subnet not in self.subnets and len(self.subnets) < MAX_SCAN_SUBNETS:
+            self.subnets.add(subnet)
+            self.kick.set()  # Sweep the new subnet now instead of waiting
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def find_ip(self, ip):
+        return next((d for d in self.devices.values() if d['ip'] == ip), None)
+
+    def snapshot(self):
+        vehicles, fpvs, area = [], [], None
+        for dev in sorted(self.devices.values(), key=lambda d: d['tag']):
+            if dev['type'] == 'area':
+                area = dev
+            elif is_camera(dev):
+                fpvs.append(dev)
+            else:
+                vehicles.append(dev)
+        return {'vehicles': vehicles, 'fpvs': fpvs, 'area': area,
+                'subnets': sorted(self.subnets)}
+
+    async def _run(self):
+        while True:
+            self.kick.clear()
+            await self.sweep()
+            try:
+                await asyncio.wait_for(self.kick.wait(), SCAN_INTERVAL_S)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _probe(self, ip):
+        async with self.limit:
+            try:
+                async with self.session.get(f'http://{ip}:{VEHICLE_PORT}/api/status') as resp:
+                    if resp.status != 200:
+                        return None
+                    info = await resp.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                return None
+        if not isinstance(info, dict) or not info.get('tag'):
+            return None
+        old = self.devices.get(info['tag'], {})
+        return {
+            'tag': info['tag'],
+            'ip': ip,
+            'type': info.get('type', 'Unknown'),
+            'project': info.get('project', 'unknown'),
+            'busy': bool(info.get('busy', False)),
+            'stream_port': old.get('stream_port'),  # Only known from beacons
+        }
+
+    def observe(self, dev):
+        """Record a sighting of a device -> True if the fleet table changed"""
+        dev['last_seen'] = time.time()
+        old = self.devices.get(dev['tag'])
+        self.devices[dev['tag']] = dev
+        vehicle_registry[dev['tag']] = dev['ip']
+        return old is None or any(old.get(k) != dev.get(k) for k in FLEET_CHANGE_FIELDS)
+
+    def expire(self):
+        now = time.time()
+        stale = [tag for tag, dev in self.devices.items() if now - dev['last_seen'] > FLEET_EXPIRY_S]
+        for tag in stale:
+            dev = self.devices.pop(tag)
+            # No longer routable, unless it was re-registered at another IP
+            if vehicle_registry.get(tag) == dev['ip']:
+                del vehicle_registry[tag]
+        return bool(stale)
+
+    async def sweep(self):
+        ips = [f'{subnet}.{i}' for subnet in sorted(self.subnets) for i in range(1, 255)]
+        results = await asyncio.gather(*(self._probe(ip) for ip in ips))
+        changed = False
+        for dev in results:
+            if dev and self.observe(dev):
+                changed = True
+        if self.expire() or changed:
+            self.notify()
+
+    def notify(self):
+        for queue in self.subscribers:
+            if not queue.full():
+                queue.put_nowait(True)
+
+def parse_beacon(data, addr):
+    """Decode a ROK1 beacon datagram -> fleet device dict, None if invalid"""
+    try:
+        fields = data.decode().split('|')
+    except UnicodeDecodeError:
+        return None
+    if len(fields) != 7 or fields[0] != BEACON_MAGIC or not fields[1]:
+        return None
+    _, tag, vtype, project, busy, ip, stream_port = fields
+    try:
+        stream_port = int(stream_port)
+    except ValueError:
+        stream_port = 0
+    return {
+        'tag': tag,
+        'ip': ip or addr[0],
+        'type': vtype,
+        'project': project,
+        'busy': busy == '1',
+        'stream_port': stream_port or None,
+    }
+
+class BeaconProtocol(asyncio.DatagramProtocol):
+    """Feeds device beacons into the fleet table"""
+
+    def __init__(self, discovery):
+        self.discovery = discovery
+
+    def datagram_received(self, data, addr):
+        dev = parse_beacon(data, addr)
+        if dev and self.discovery.observe(dev):
+            self.discovery.notify()
+
+def is_camera(dev):
+    return dev['type'] == 'fpv' or dev['project'] in ('vision', 'RokVision')
+
+async def init_discovery(app):
+    app['discovery'] = FleetDiscovery()
+    await app['discovery'].start()
+    loop = asyncio.get_running_loop()
+    app['beacon_transport'], _ = await loop.create_datagram_endpoint(
+        lambda: BeaconProtocol(app['discovery']), local_addr=('0.0.0.0', BEACON_PORT))
+
+async def close_discovery(app):
+    app['beacon_transport'].close()
+    await app['discovery'].stop()
+
+async def handle_scan_fleet(request):
+    discovery = request.app['discovery']
+    subnet = request.query.get('subnet')
+    if subnet:
+        discovery.add_subnet(subnet)
+    return web.json_response(discovery.snapshot())
+
+async def handle_scan_events(request):
+    """Server-sent events: pushes the full fleet table whenever it changes"""
+    discovery = request.app['discovery']
+    queue = discovery.subscribe()
+    resp = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+    })
+    try:
+        await resp.prepare(request)
+        while True:
+            data = json.dumps(discovery.snapshot())
+            await resp.write(f'data: {data}\n\n'.encode())
+            await queue.get()
+    except ConnectionResetError:
+        pass  # Client went away
+    finally:
+        discovery.unsubscribe(queue)
+    return resp
+
+async def handle_scan_probe(request):
+    """Legacy per-IP probes (/api/_scan/status|fpv|stream|area?ip=), answered from the fleet table"""
+    probe = request.match_info['probe']
+    dev = request.app['discovery'].find_ip(request.query.get('ip', ''))
+    if dev and probe == 'status':
+        return web.json_response(dev)
+    if dev and probe in ('fpv', 'stream') and is_camera(dev):
+        return web.Response(text='OK')
+    if dev and probe == 'area' and dev['type'] == 'area':
+        return web.Response(text='OK')
+    return web.Response(status=404, text='Not found')
+
 # --- Vehicle registry update endpoint (LAN only, for vehicles to self-register) ---
 async def handle_register(request):
     data = await request.json()
@@ -91,10 +581,21 @@ async def handle_register(request):
 
 # --- App setup ---
 app = web.Application()
+app.on_startup.append(init_vehicle_sessions)
+app.on_cleanup.append(close_vehicle_sessions)
+app.on_startup.append(init_mjpeg_fanouts)
+app.on_cleanup.append(close_mjpeg_fanouts)
+app.on_startup.append(init_discovery)
+app.on_cleanup.append(close_discovery)
 app.router.add_get('/', handle_static)
 app.router.add_get('/{filename}', handle_static)
+# Discovery routes must be registered before the generic /api/{tag} proxy
+app.router.add_get('/api/_scan/fleet', handle_scan_fleet)
+app.router.add_get('/api/_scan/events', handle_scan_events)
+app.router.add_get('/api/_scan/{probe}', handle_scan_probe)
 app.router.add_route('*', '/api/{tag}/{path:.*}', handle_api)
 app.router.add_route('*', '/ws/{tag}', handle_ws)
+app.router.add_get('/stream/{tag}', handle_stream)
 app.router.add_post('/register_vehicle', handle_register)
 
 if __name__ == '__main__':
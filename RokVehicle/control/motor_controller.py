@@ -15,6 +15,14 @@ PWM_FREQ = 2000
 MAX_DUTY = 65535
 WATCHDOG_TIMEOUT_MS = 2000
 
+# Binary control frame (WebSocket subprotocol "rok.bin.v1"), full vehicle state:
+#   byte 0       CONTROL_FRAME_VERSION
+#   1 byte each  axis motors, signed -100..100 (sign = direction, 0 = stop)
+#   1 byte each  motor functions, signed -1/0/1 (rev/off/fwd)
+#   bitmask      logic functions, 1 bit each, LSB first, padded to whole bytes
+# Controls appear in the order listed for the vehicle type in VEHICLE_TYPES.
+CONTROL_FRAME_VERSION = 1
+
 # Pin map controls which pins are used by motors, so motor 1 using pins 1 and 2, etc.
 MOTOR_PIN_MAP = {
     1: (1, 2),  # D0 and D1
@@ -232,6 +240,12 @@ class MotorController:
         # Get custom motor number mapping if present
         motor_numbers = get_config_value("motor_numbers", {})
 
+        # Control order from the vehicle type (MicroPython dicts are unordered,
+        # and the binary control frame relies on a fixed order)
+        self.axis_names = list(vinfo.get("axis_motors", []))
+        self.motor_function_names = list(vinfo.get("motor_functions", []))
+        self.function_names = list(vinfo.get("functions", []))
+
         # Axis motors (continuous, axis-assignable)
         self.axis_motors = {}
         motor_reversed_cfg = get_config_value("motor_reversed", {})
@@ -331,6 +345,79 @@ class MotorController:
         if m:
             m.stop()
 
+    def _drive_axis(self, m, value, now):
+        # value: signed -100..100, 0 stops
+        if value:
+            m.set_output_axis("fwd" if value > 0 else "rev", abs(value) / 100.0)
+            m.last_update_ms = now
+        elif m.running:
+            m.stop()
+
+    def _drive_function(self, m, value, now):
+        # value: sign selects direction, 0 stops
+        if value:
+            m.set_output_function("fwd" if value > 0 else "rev", True)
+            m.last_update_ms = now
+        elif m.running:
+            m.stop()
+
+    def apply_batch(self, motors=None, functions=None):
+        """Update several controls in one pass with a single timestamp.
+        motors: {name: signed power -100..100} for axis motors and motor
+        functions (sign = direction, 0 = stop); functions: {name: bool}.
+        Controls not named are left as they are."""
+        now = time.ticks_ms()
+        if motors:
+            for name, value in motors.items():
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if name in self.axis_motors:
+                    self._drive_axis(self.axis_motors[name], value, now)
+                elif name in self.motor_functions:
+                    self._drive_function(self.motor_functions[name], value, now)
+        if functions and self.function_controller:
+            for name, on in functions.items():
+                on = bool(on)
+                if name in self.functions and self.functions[name] != on:
+                    self.set_function(name, on)
+
+    def apply_control_frame(self, data):
+        """Apply a binary control frame (see CONTROL_FRAME_VERSION) in one pass.
+        Returns False if the frame doesn't match this vehicle's layout."""
+        n_axis = len(self.axis_names)
+        n_fn = len(self.motor_function_names)
+        n_logic = len(self.function_names)
+        if (
+            len(data) != 1 + n_axis + n_fn + (n_logic + 7) // 8
+            or data[0] != CONTROL_FRAME_VERSION
+        ):
+            return False
+
+        now = time.ticks_ms()
+        i = 1
+        for name in self.axis_names:
+            v = data[i]
+            i += 1
+            if v > 127:
+                v -= 256  # signed byte
+            self._drive_axis(self.axis_motors[name], v, now)
+
+        for name in self.motor_function_names:
+            v = data[i]
+            i += 1
+            if v > 127:
+                v -= 256
+            self._drive_function(self.motor_functions[name], v, now)
+
+        if self.function_controller:
+            for bit, fname in enumerate(self.function_names):
+                on = bool(data[i + (bit >> 3)] & (1 << (bit & 7)))
+                if self.functions[fname] != on:
+                    self.set_function(fname, on)
+        return True
+
     def stop_all(self):
         for m in list(self.axis_motors.values()) + list(self.motor_functions.values()):
             m.stop()
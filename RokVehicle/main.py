@@ -1,17 +1,20 @@
-import time
-
-time.sleep(2)  # allow USB enumeration before WiFi touches peripherals
-
+from RokCommon.startup import boot_timer
 import web.web_server
 from RokCommon.variables.vars_store import init_config, get_config_value
-from RokCommon.networking.wifi_manager import connect_to_wifi
-from control.led_status import init_led_status, startup_blink, set_wifi_status
+from control.led_status import init_led_status, startup_blink
 
 # Start UDP listener (non-blocking). Module auto-starts its thread on import.
-import networking.udp_listener
+# Not in every deployment; web_server already runs without its cmd_queue.
+try:
+    import networking.udp_listener
+except ImportError as e:
+    print(f"UDP listener unavailable: {e}")
+
+boot_timer.mark("imports")
 
 # Initialize configuration first
 cfg = init_config()
+boot_timer.mark("config")
 
 led_pin = get_config_value("ledPin", 9)
 led_enabled = get_config_value("ledEnabled", True)
@@ -26,15 +29,11 @@ else:
     led_manager = get_led_manager()
     if led_manager:
         led_manager.set_override(True, False)
-
-# Connect to Wifi
-wlan = connect_to_wifi()
-
-# Set LED pattern based on WiFi status and exit
-if led_enabled:
-    set_wifi_status()
+boot_timer.mark("led")
 
 # ---- Start async web server (non-blocking) ----
+# Wi-Fi, the web server, asset precaching and the motor watchdog all start
+# together on the server thread's event loop (see web.web_server.run)
 import _thread
 
 
@@ -44,4 +43,4 @@ def start_server_thread():
 
 start_server_thread()
 
-print("System ready — async web server running in background.")
+print("Booting — Wi-Fi and web server starting in background.")
@@ -98,6 +98,7 @@ def handle_get():
 from RokCommon.variables.vars_store import get_config_value, save_config_value
 from RokCommon.variables.vehicle_types import VEHICLE_TYPES
 from RokCommon.web.pages.home_page import load_and_process_header
+from RokCommon.web.template import get_template
 
 
 # ---------------------------------------------------------
@@ -189,59 +190,26 @@ def build_admin_page(cfg):
         )
 
     vehicle_tag = cfg.get("vehicleTag") or ""
-    vehicle_name = (
-        cfg.get("vehicleName") or ""
-    )  # Use template caching from web_server module
+    vehicle_name = cfg.get("vehicleName") or ""
     try:
-        # Load template helper function
-        def _load_template(path):
-            """Load template with fallback paths"""
-            from RokCommon.web.static_assets import load_template
-
-            # For project-specific templates, try relative path first
-            if (
-                "admin_page.html" in path
-                or "testing_page.html" in path
-                or "play_page.html" in path
-            ):
-                content = load_template(path)
-                if content is not None:
-                    return content
-                # Don't try RokCommon path for project-specific templates
-                return None
-
-            # For common templates, try RokCommon path first
-            content = load_template(f"RokCommon/{path}")
-            if content is not None:
-                return content
-            # Fallback to relative path
-            content = load_template(path)
-            if content is not None:
-                return content
-            return None
-
         import gc
 
-        # Load header navigation using shared function
-        header_nav = load_and_process_header(vehicle_name)
-        if not header_nav:
-            header_nav = f"<div style='background:#222;color:#fff;padding:12px;text-align:center'>Rokenbok Vehicle Control<br><span style='color:#f9e79f'>{vehicle_name}</span></div>"
-
-        html = _load_template("web/pages/assets/admin_page.html")
-        if html:
-            # Ensure all template replacements are single-line and whitespace-free
-            html = html.replace(
-                "{{ header_nav }}", header_nav.strip().replace("\n", "")
-            )
-            html = html.replace("{{ type_option }}", type_options.strip())
-            html = html.replace("{{ vehicle_tag }}", vehicle_tag.strip())
-            html = html.replace("{{ vehicle_name }}", vehicle_name.strip())
-            html = html.replace("{{vehicle_type_map}}", vehicle_type_map.strip())
-            html = html.replace("{{ led_status }}", "")  # Remove LED status display
-            html = html.replace(
-                "{{ led_enabled_checked }}", "checked" if led_enabled else ""
+        # Compiled template; motor pin usage can change without a config save,
+        # so this page is rendered (and streamed) per request rather than cached
+        template = get_template("web/pages/assets/admin_page.html")
+        if template:
+            html = template.render(
+                {
+                    "header_nav": load_and_process_header(vehicle_name),
+                    "type_option": type_options.strip(),
+                    "vehicle_tag": vehicle_tag.strip(),
+                    "vehicle_name": vehicle_name.strip(),
+                    "vehicle_type_map": vehicle_type_map.strip(),
+                    "led_status": "",  # Remove LED status display
+                    "led_enabled_checked": "checked" if led_enabled else "",
+                    "led_pin_options": led_pin_options.strip(),
+                }
             )
-            html = html.replace("{{ led_pin_options }}", led_pin_options.strip())
         else:
             html = (
                 f"<html><body><h2>Error loading admin page template</h2></body></html>"
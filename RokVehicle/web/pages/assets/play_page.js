@@ -27,6 +27,8 @@ const state = {
     // WebSocket
     ws: null,
     isConnected: false,
+    binaryFrames: false, // true once the vehicle accepts the binary subprotocol
+    frame: { axis: {}, motorFns: {}, logic: {}, dirty: false },
 
     // Mapping UI
     mappingActive: null, // { field, type, ... }
@@ -35,6 +37,9 @@ const state = {
 // --- Constants ---
 const DEADZONE = 0.1;
 const KEEPALIVE_INTERVAL = 100; // ms, for motor watchdog
+const WS_PROTOCOL_BINARY = 'rok.bin.v1';
+const WS_PROTOCOL_JSON = 'rok.json';
+const CONTROL_FRAME_VERSION = 1;
 
 // --- Initialization ---
 document.addEventListener('DOMContentLoaded', () => {
@@ -108,9 +113,12 @@ function initWebSocket() {
 
     const wsUrl = `ws://${location.host}/ws`;
     try {
-        state.ws = new WebSocket(wsUrl);
+        state.ws = new WebSocket(wsUrl, [WS_PROTOCOL_BINARY, WS_PROTOCOL_JSON]);
+        state.ws.binaryType = 'arraybuffer';
         state.ws.onopen = () => {
             state.isConnected = true;
+            // Older firmware answers without a subprotocol; stay on JSON then
+            state.binaryFrames = state.ws.protocol === WS_PROTOCOL_BINARY;
             updateConnectionStatusUI('Connected');
         };
         state.ws.onclose = () => {
@@ -232,6 +240,7 @@ function gamepadLoop() {
 
     processMotorFunctions(gp);
     processLogicFunctions(gp);
+    flushControlFrame();
 }
 
 /**
@@ -455,25 +464,27 @@ function processControl(key, isActive, sendActive, sendStop) {
  */
 function stopAllMotors() {
     Object.keys(state.controlState).forEach(key => {
-        if (state.controlState[key].active) {
-            if (key.startsWith('axis_') || key.startsWith('dpad_') || key.startsWith('motorfn_')) {
-                const motorName = key.split('_')[1];
-                // Use proper stop command instead of power 0
-                if (state.isConnected) {
-                    const command = { action: 'stop', name: motorName };
-                    state.ws.send(JSON.stringify(command));
-                }
+        state.controlState[key].active = false;
+    });
+    // Only resend when something was still running; this runs every tick
+    // while no gamepad is connected
+    const { axis, motorFns } = state.frame;
+    [axis, motorFns].forEach(values => {
+        Object.keys(values).forEach(name => {
+            if (values[name]) {
+                values[name] = 0;
+                state.frame.dirty = true;
             }
-            state.controlState[key].active = false;
-        }
+        });
     });
+    flushControlFrame();
 }
 
 
 // --- WebSocket Command Senders ---
 
 /**
- * Sends a command to a motor.
+ * Records a motor command; sent with the rest of the tick by flushControlFrame.
  * @param {string} name - The name of the motor.
  * @param {string} dir - The direction ('fwd' or 'rev').
  * @param {number} power - The power level (0 to 100).
@@ -481,27 +492,61 @@ function stopAllMotors() {
 function sendMotorCommand(name, dir, power) {
     if (!state.isConnected) return;
 
-    // Use stop action when power is 0, otherwise use set action
-    if (power === 0) {
-        const command = { action: 'stop', name };
-        state.ws.send(JSON.stringify(command));
+    const clamped = Math.max(0, Math.min(100, Math.round(power)));
+    const signed = dir === 'rev' ? -clamped : clamped;
+    if (state.vehicleConfig.motorFunctions.includes(name)) {
+        state.frame.motorFns[name] = Math.sign(signed);
     } else {
-        // Power is already in 0-100 range
-        const clampedPower = Math.max(0, Math.min(100, power));
-        const command = { action: 'set', name, dir, power: clampedPower };
-        state.ws.send(JSON.stringify(command));
+        state.frame.axis[name] = signed;
     }
+    state.frame.dirty = true;
 }
 
 /**
- * Sends a command for a logic function.
+ * Records a logic function state; sent with the rest of the tick by flushControlFrame.
  * @param {string} id - The ID of the logic function.
  * @param {boolean} pressed - The state of the function.
  */
 function sendLogicCommand(id, pressed) {
     if (!state.isConnected) return;
-    const command = { action: 'logic_function', id, pressed };
-    state.ws.send(JSON.stringify(command));
+    state.frame.logic[id] = !!pressed;
+    state.frame.dirty = true;
+}
+
+
+/**
+ * Sends the tick's control state as a single message, if anything changed, so
+ * every motor on the vehicle is updated at the same instant.
+ * Binary layout: version byte, int8 per axis motor (-100..100), int8 per motor
+ * function (-1/0/1), then a logic-function bitmask (LSB first), in the order
+ * the vehicle reported them in its config. Otherwise a JSON "batch" message.
+ */
+function flushControlFrame() {
+    if (!state.frame.dirty || !state.isConnected) return;
+    const { axisMotors, motorFunctions, logicFunctions } = state.vehicleConfig;
+    const { axis, motorFns, logic } = state.frame;
+
+    if (!state.binaryFrames) {
+        const motors = { ...axis };
+        Object.keys(motorFns).forEach(name => { motors[name] = motorFns[name] * 100; });
+        state.ws.send(JSON.stringify({ action: 'batch', motors, functions: logic }));
+        state.frame.dirty = false;
+        return;
+    }
+
+    const buf = new Int8Array(
+        1 + axisMotors.length + motorFunctions.length + Math.ceil(logicFunctions.length / 8)
+    );
+    let i = 0;
+    buf[i++] = CONTROL_FRAME_VERSION;
+    axisMotors.forEach(name => { buf[i++] = axis[name] || 0; });
+    motorFunctions.forEach(name => { buf[i++] = motorFns[name] || 0; });
+    logicFunctions.forEach((name, bit) => {
+        if (logic[name]) buf[i + (bit >> 3)] |= 1 << (bit & 7);
+    });
+
+    state.ws.send(buf.buffer);
+    state.frame.dirty = false;
 }
 
 
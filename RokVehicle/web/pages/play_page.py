@@ -2,6 +2,8 @@
 
 from RokCommon.variables.vars_store import get_config_value
 from RokCommon.variables.vehicle_types import VEHICLE_TYPES
+from RokCommon.web.pages.home_page import load_and_process_header
+from RokCommon.web.template import get_template, render_cached
 import json
 
 
@@ -114,46 +116,39 @@ def handle_get(query_string=None):
             ),
         )
 
-    # Load header/nav HTML and inject vehicle_name
-    try:
-        with open("web/pages/assets/header_nav.html", "r") as f:
-            header_nav = f.read().replace("{{ vehicle_name }}", vehicle_name)
-    except Exception:
-        header_nav = f"<div style='background:#222;color:#fff;padding:12px;text-align:center'>Rokenbok Vehicle Control<br><span style='color:#f9e79f'>{vehicle_name}</span></div>"
+    # Everything on the page comes from config: render once per config change
+    return ("200 OK", "text/html", render_cached("play_page", _render_play_page))
 
+
+def _render_play_page():
+    vtype, vehicle_name, info = get_vehicle_info()
     vehicle_type = vtype or "Unknown"
-    vehicle_name = get_config_value("vehicleName", "Unnamed Vehicle")
+    vehicle_name = vehicle_name or "Unnamed Vehicle"
     motors = info.get("motor_map", {}) if info else {}
-    axis_map = {name: f"Axis {i+1}" for i, name in enumerate(motors.keys())}
     axis_map_list = "".join(
-        [f"<li>{name}: {axis_map[name]}</li>" for name in motors.keys()]
+        [f"<li>{name}: Axis {i+1}</li>" for i, name in enumerate(motors.keys())]
     )
     cam_cfg = get_config_value("camera_ips", {})
-    area_ip = cam_cfg.get("area", "")
-    fpv_ip = cam_cfg.get("fpv", "")
-    view_mode = get_config_value("view_mode", "area")
-    pip_flip = get_config_value("pip_flip", False)
     drive_mode = get_config_value("drive_mode", "tank")
-
-    # Load main HTML from asset file and inject values
-    try:
-        with open("web/pages/assets/play_page.html", "r") as f:
-            html = f.read()
-        html = html.replace("{{ header_nav }}", header_nav)
-        html = html.replace("{{ vehicle_name }}", vehicle_name)
-        html = html.replace("{{ vehicle_type }}", vehicle_type)
-        html = html.replace("{{ axis_map_list }}", axis_map_list)
-        html = html.replace("{{ area_ip }}", area_ip)
-        html = html.replace("{{ fpv_ip }}", fpv_ip)
-        # MicroPython str may not have capitalize()
-        if drive_mode:
-            drive_mode_cap = drive_mode[0].upper() + drive_mode[1:]
-        else:
-            drive_mode_cap = drive_mode
-        html = html.replace("{{ drive_mode }}", drive_mode_cap)
-    except Exception as e:
-        html = f"<html><body><h2>Error loading play page: {e}</h2></body></html>"
-    return ("200 OK", "text/html", html)
+    # MicroPython str may not have capitalize()
+    if drive_mode:
+        drive_mode = drive_mode[0].upper() + drive_mode[1:]
+
+    # Shared loader: compiled once, with fingerprinted asset URLs
+    template = get_template("web/pages/assets/play_page.html")
+    if template is None:
+        return "<html><body><h2>Error loading play page: play_page.html not found</h2></body></html>"
+    return template.render(
+        {
+            "header_nav": load_and_process_header(vehicle_name),
+            "vehicle_name": vehicle_name,
+            "vehicle_type": vehicle_type,
+            "axis_map_list": axis_map_list,
+            "area_ip": cam_cfg.get("area", ""),
+            "fpv_ip": cam_cfg.get("fpv", ""),
+            "drive_mode": drive_mode,
+        }
+    )
 
 
 # ---------------------------------------------------------
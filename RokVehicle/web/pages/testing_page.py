@@ -3,6 +3,7 @@
 from RokCommon.variables.vars_store import get_config_value
 from RokCommon.variables.vehicle_types import VEHICLE_TYPES
 from RokCommon.web.pages.home_page import load_and_process_header
+from RokCommon.web.template import get_template
 import json
 
 
@@ -91,15 +92,6 @@ def handle_get():
             + "<br><br></div>"
         )
 
-    # Load header/nav HTML and inject vehicle_name
-    try:
-        # Load header navigation using shared function
-        header_nav = load_and_process_header(vehicle_name)
-        if not header_nav:
-            raise Exception("Header template not found")
-    except Exception as e:
-        header_nav = f"<div style='background:#222;color:#fff;padding:12px;text-align:center'>Rokenbok Vehicle Control<br><span style='color:#f9e79f'>{vehicle_name or 'Unknown'}</span></div>"
-
     # Inject function motor list for JS
     function_motor_list = []
     if info:
@@ -108,40 +100,18 @@ def handle_get():
         f"<script>window.functionMotors = {json.dumps(function_motor_list)};</script>"
     )
     try:
-        # Load template helper function
-        def _load_template(path):
-            """Load template with fallback paths"""
-            from RokCommon.web.static_assets import load_template
-
-            # For project-specific templates, try relative path first
-            if (
-                "admin_page.html" in path
-                or "testing_page.html" in path
-                or "play_page.html" in path
-            ):
-                content = load_template(path)
-                if content is not None:
-                    return content
-                # Don't try RokCommon path for project-specific templates
-                return None
-
-            # For common templates, try RokCommon path first
-            content = load_template(f"RokCommon/{path}")
-            if content is not None:
-                return content
-            # Fallback to relative path
-            content = load_template(path)
-            if content is not None:
-                return content
-            return None
-
-        html = _load_template("web/pages/assets/testing_page.html")
-        if html is None:
+        # Compiled template, streamed; motor assignments are live state
+        template = get_template("web/pages/assets/testing_page.html")
+        if template is None:
             raise Exception("Testing page template is None")
-        html = html.replace("{{ header_nav }}", header_nav or "")
-        html = html.replace("{{ vtype }}", vtype or "")
-        html = html.replace("{{ motor_html }}", motor_html or "")
-        html = html.replace("</body>", function_motor_js + "</body>")
+        html = template.render(
+            {
+                "header_nav": load_and_process_header(vehicle_name),
+                "vtype": vtype or "",
+                "motor_html": motor_html,
+                "function_motor_js": function_motor_js,
+            }
+        )
     except Exception as e:
         html = f"<html><body><h2>Error loading testing page: {e}</h2><p>vehicle_name: {vehicle_name}</p><p>vtype: {vtype}</p></body></html>"
 
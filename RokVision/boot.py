@@ -1,4 +1,30 @@
 # boot.py
 # Runs once at boot before main.py
+import sys
 import time
-time.sleep(0.1)  # allow USB to enumerate cleanly
\ No newline at end of file
+time.sleep(0.1)  # allow USB to enumerate cleanly
+
+# Import precompiled modules (tools/build_mpy.py) ahead of the sources when
+# this firmware can load their bytecode version; must run before anything
+# imports RokCommon
+try:
+    with open("mpy/mpy_version") as f:
+        mpy_version = f.read().strip()
+    # "<version>[.<flags>]": flags (arch, sub-version) only if native code
+    version, _, flags = mpy_version.partition(".")
+    mpy = getattr(sys.implementation, "_mpy", 0)
+    if int(version) == mpy & 0xFF and (not flags or int(flags) == mpy >> 8):
+        sys.path.insert(0, "/mpy")
+    else:
+        print(f"Ignoring /mpy: built for bytecode {mpy_version}, running sources")
+except OSError:
+    pass  # Source-only deployment
+
+# Finish (or roll back) an OTA update cut off mid-commit, before main.py
+# imports any of the files it touched
+try:
+    from RokCommon.ota.ota_transaction import recover
+
+    recover()
+except Exception as e:
+    print(f"OTA recovery failed: {e}")
@@ -1,43 +1,53 @@
-import time
+from RokCommon.startup import boot_timer
 import sys
 import web.web_server
 from RokCommon.variables.vars_store import init_config
-from RokCommon.networking.wifi_manager import connect_to_wifi
+from RokCommon.networking.wifi_manager import connect_to_wifi_async
 
 if "/" not in sys.path:
     sys.path.append("/")
 
+boot_timer.mark("imports")
+
 # Validation configuration and create/load defaults if needed
 cfg = init_config()
+boot_timer.mark("config")
 
-
-# Connect to Wifi
-wlan = connect_to_wifi()
-
-# ---- Run both web server and camera stream in single asyncio event loop ----
+# ---- Run Wi-Fi, web server and camera stream in single asyncio event loop ----
 import uasyncio as asyncio
+from RokCommon.startup import start_services, when_online
 from cam.camera_stream import start_camera_stream_async
 import _thread
 
 
 async def main():
-    """Main async function to run both services concurrently"""
+    """Main async function: bring all services up concurrently, then run them"""
     try:
-        print("Starting web server and camera stream...")
+        print("Starting Wi-Fi, web server and camera stream...")
 
-        # Start web server first (it's more critical)
-        print("1. Starting web server...")
-        web_server = await web.web_server.start_web_server()
-
-        # Give web server a moment to start
-        await asyncio.sleep(2)
-
-        # Then start camera stream
-        print("2. Starting camera stream...")
+        # The camera stream server runs for good; it doesn't need Wi-Fi to
+        # bind, so it starts right away with the rest
         camera_task = asyncio.create_task(start_camera_stream_async(cfg))
 
-        # Give camera stream a moment to initialize
-        await asyncio.sleep(2)
+        # Announce this camera to the relay with periodic UDP beacons, once online
+        try:
+            from RokCommon.networking.beacon import run_beacon
+
+            asyncio.create_task(when_online(run_beacon()))
+        except Exception as e:
+            print(f"Beacon unavailable: {e}")
+
+        # Wi-Fi associates while the web server starts
+        wlan, web_server = await start_services(
+            [
+                ("wifi", connect_to_wifi_async()),
+                ("web server", web.web_server.start_web_server()),
+            ]
+        )
+        if isinstance(web_server, Exception):
+            print(f"Web server failed to start: {web_server}")
+            web_server = None
+        boot_timer.report()
 
         print("System ready — web server and camera stream running concurrently.")
 
@@ -3,6 +3,7 @@ from RokCommon.variables.vehicle_types import VEHICLE_TYPES
 from RokCommon.web.request_response import Request, Response
 from RokCommon.web import PageHandler
 from RokCommon.web.pages.home_page import load_and_process_header
+from RokCommon.web.template import get_template, render_cached
 import random
 
 # Import camera reconfiguration function
@@ -43,8 +44,10 @@ class AdminPageHandler(PageHandler):
                 "cam_speffect": get_config_value("cam_speffect", 0),
                 "cam_stream_port": get_config_value("cam_stream_port", 8081),
             }
-            html = build_admin_page(cfg)
-            return Response.html(html)
+            # Every value on the page is config: render once per config change
+            return Response.html(
+                render_cached("admin_page", lambda: build_admin_page(cfg))
+            )
         except Exception as e:
             print(f"Admin page GET error: {e}")
             return Response.server_error(f"Admin page error: {e}")
@@ -58,9 +61,9 @@ class AdminPageHandler(PageHandler):
             # Return redirect response
             if result and len(result) > 1:
                 redirect_path = result[1]
-                return Response.redirect(redirect_path)
+                return Response.redirect_to(redirect_path)
             else:
-                return Response.redirect("/admin")
+                return Response.redirect_to("/admin")
 
         except Exception as e:
             print(f"Admin page POST error: {e}")
@@ -195,7 +198,7 @@ def handle_get():
         "cam_speffect": get_config_value("cam_speffect", 0),
         "cam_stream_port": get_config_value("cam_stream_port", 8081),
     }
-    html = build_admin_page(cfg)
+    html = render_cached("admin_page", lambda: build_admin_page(cfg))
     return "200 OK", "text/html", html
 
 
@@ -214,38 +217,6 @@ handle_post = admin_handler.handle_post
 def build_admin_page(cfg):
     """Build the admin page HTML with current configuration"""
     try:
-        # Load header navigation using shared function
-        header_nav = load_and_process_header(cfg.get("vehicleName", ""))
-        if not header_nav:
-            header_nav = "<div>Header not found</div>"
-
-        # Load template helper function
-        def _load_template(path):
-            """Load template with fallback paths"""
-            from RokCommon.web.static_assets import load_template
-
-            # For project-specific templates, try relative path first
-            if (
-                "admin_page.html" in path
-                or "testing_page.html" in path
-                or "play_page.html" in path
-            ):
-                content = load_template(path)
-                if content is not None:
-                    return content
-                # Don't try RokCommon path for project-specific templates
-                return None
-
-            # For common templates, try RokCommon path first
-            content = load_template(f"RokCommon/{path}")
-            if content is not None:
-                return content
-            # Fallback to relative path
-            content = load_template(path)
-            if content is not None:
-                return content
-            return None
-
         # Build vehicle type options
         type_options = "".join(
             [
@@ -270,9 +241,9 @@ def build_admin_page(cfg):
             ]
         )
 
-        # Load main admin page template
-        html = _load_template("web/pages/assets/admin_page.html")
-        if not html:
+        # Load main admin page template (compiled once)
+        template = get_template("web/pages/assets/admin_page.html")
+        if template is None:
             return "<html><body><h2>Admin page template not found</h2></body></html>"
 
         # Replace template variables
@@ -326,31 +297,28 @@ def build_admin_page(cfg):
         vflip_checked = "checked" if vflip == "1" else ""
         hmirror_checked = "checked" if hmirror == "1" else ""
 
-        replacements = {
-            "{{ header_nav }}": header_nav,
-            "{{ type_options }}": type_options,
-            "{{ vehicle_tag }}": cfg.get("vehicleTag", "") or "",
-            "{{ vehicle_name }}": cfg.get("vehicleName", "") or "",
-            "{{ framesize_options }}": framesize_options_html,
-            "{{ speffect_options }}": speffect_options_html,
-            "{{ vflip_checked }}": vflip_checked,
-            "{{ hmirror_checked }}": hmirror_checked,
-            "{{ cam_framesize }}": framesize,
-            "{{ cam_quality }}": quality,
-            "{{ cam_contrast }}": contrast,
-            "{{ cam_brightness }}": brightness,
-            "{{ cam_saturation }}": saturation,
-            "{{ cam_vflip }}": vflip,
-            "{{ cam_hmirror }}": hmirror,
-            "{{ cam_speffect }}": speffect,
-            "{{ cam_stream_port }}": stream_port,
-            "{{vehicle_type_map}}": vehicle_type_js,
-        }
-
-        for placeholder, value in replacements.items():
-            html = html.replace(placeholder, value)
-
-        return html
+        return template.render(
+            {
+                "header_nav": load_and_process_header(cfg.get("vehicleName", "")),
+                "type_options": type_options,
+                "vehicle_tag": cfg.get("vehicleTag", "") or "",
+                "vehicle_name": cfg.get("vehicleName", "") or "",
+                "framesize_options": framesize_options_html,
+                "speffect_options": speffect_options_html,
+                "vflip_checked": vflip_checked,
+                "hmirror_checked": hmirror_checked,
+                "cam_framesize": framesize,
+                "cam_quality": quality,
+                "cam_contrast": contrast,
+                "cam_brightness": brightness,
+                "cam_saturation": saturation,
+                "cam_vflip": vflip,
+                "cam_hmirror": hmirror,
+                "cam_speffect": speffect,
+                "cam_stream_port": stream_port,
+                "vehicle_type_map": vehicle_type_js,
+            }
+        )
 
     except Exception as e:
         print(f"Error building admin page: {e}")
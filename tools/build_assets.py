@@ -0,0 +1,117 @@
+"""
+Precompress web assets for the devices (run on the host before uploading)
+
+Writes a gzip sibling (<name>.gz) next to every compressible file under the
+web/pages/assets folders. The device web servers send the .gz file as-is with
+Content-Encoding: gzip to clients that accept it, and the original otherwise.
+
+Also writes asset_manifest.json in each folder with a content hash per asset,
+used by the devices for ETags and fingerprinted ?v= URLs without hashing the
+files at boot.
+
+Usage:
+    python tools/build_assets.py          # build/refresh .gz files and manifests
+    python tools/build_assets.py --clean  # remove all generated files
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ASSET_DIRS = [
+    "RokCommon/web/pages/assets",
+    "RokVehicle/web/pages/assets",
+    "RokVision/web/pages/assets",
+]
+
+# Must match RokCommon/web/static_assets.py
+ASSET_MANIFEST = "asset_manifest.json"
+ASSET_HASH_LEN = 16
+
+# Already-compressed formats gain nothing from gzip
+COMPRESSIBLE = (".js", ".css", ".html", ".svg", ".json", ".txt", ".ico")
+
+
+def _asset_files(asset_dir):
+    for root, _dirs, files in os.walk(asset_dir):
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+
+def build(asset_dir):
+    """Write .gz siblings and the hash manifest for one asset folder
+    -> (files written, bytes saved)"""
+    written = 0
+    saved = 0
+    manifest = {}
+    for path in _asset_files(asset_dir):
+        gz_path = path + ".gz"
+        if path.endswith(".gz"):
+            # Drop outputs whose source was deleted
+            if not os.path.exists(path[:-3]):
+                os.remove(path)
+            continue
+        if os.path.basename(path) == ASSET_MANIFEST:
+            continue
+
+        with open(path, "rb") as f:
+            raw = f.read()
+        if os.path.dirname(path) == asset_dir:
+            # Only top-level files are served under /assets/<name>
+            digest = hashlib.sha256(raw).hexdigest()[:ASSET_HASH_LEN]
+            manifest[os.path.basename(path)] = digest
+
+        if not path.endswith(COMPRESSIBLE):
+            continue
+        # mtime=0 keeps output byte-identical between builds
+        packed = gzip.compress(raw, compresslevel=9, mtime=0)
+
+        if len(packed) >= len(raw):
+            # Not worth it; make sure no stale variant gets served
+            if os.path.exists(gz_path):
+                os.remove(gz_path)
+            continue
+
+        if os.path.exists(gz_path):
+            with open(gz_path, "rb") as f:
+                if f.read() == packed:
+                    saved += len(raw) - len(packed)
+                    continue
+        with open(gz_path, "wb") as f:
+            f.write(packed)
+        written += 1
+        saved += len(raw) - len(packed)
+        print(f"  {os.path.relpath(path, REPO_ROOT)}: {len(raw)} -> {len(packed)} bytes")
+
+    with open(os.path.join(asset_dir, ASSET_MANIFEST), "w") as f:
+        json.dump(manifest, f, sort_keys=True)
+    return written, saved
+
+
+def clean(asset_dir):
+    """Remove generated .gz files and the manifest from one asset folder"""
+    for path in _asset_files(asset_dir):
+        if path.endswith(".gz") or os.path.basename(path) == ASSET_MANIFEST:
+            os.remove(path)
+            print(f"  removed {os.path.relpath(path, REPO_ROOT)}")
+
+
+def main(argv):
+    for rel in ASSET_DIRS:
+        asset_dir = os.path.join(REPO_ROOT, rel)
+        if not os.path.isdir(asset_dir):
+            continue
+        if "--clean" in argv:
+            clean(asset_dir)
+        else:
+            written, saved = build(asset_dir)
+            print(f"{rel}: {written} updated, {saved} bytes saved")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
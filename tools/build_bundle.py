@@ -0,0 +1,129 @@
+"""
+Pack a device deployment into one OTA bundle (run on the host)
+
+Collects a project folder (deployed to the device root) plus RokCommon
+(deployed as /RokCommon) into a single .rkb file, which the OTA page
+installs in one upload. Files are raw-deflate compressed where that makes
+them smaller. Run tools/build_assets.py first so the .gz assets and asset
+manifests are current. With --mpy the modules are also compiled (see
+tools/build_mpy.py) and shipped as /mpy next to the sources.
+
+Format (must match RokCommon/ota/ota_bundle.py):
+    b"RKB1" | index length (u32 LE) | index JSON | file data, in index order
+
+Usage:
+    python tools/build_bundle.py RokVehicle            # -> RokVehicle.rkb
+    python tools/build_bundle.py RokVision -o out.rkb
+    python tools/build_bundle.py RokVehicle --no-compress
+    python tools/build_bundle.py RokVehicle --mpy      # sources + bytecode
+"""
+
+import hashlib
+import json
+import os
+import sys
+import zlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECTS = ("RokVehicle", "RokVision")
+
+# Must match RokCommon/ota/ota_bundle.py
+BUNDLE_MAGIC = b"RKB1"
+BUNDLE_EXT = ".rkb"
+
+# Never shipped: local state on the device and host clutter
+SKIP_DIRS = ("__pycache__", ".git")
+SKIP_FILES = (".DS_Store",)
+SKIP_PATHS = ("variables/config.json",)  # Device paths
+SKIP_SUFFIXES = (".pyc", BUNDLE_EXT)
+
+
+def deployment_files(project):
+    # (source path, device path) for the project root and RokCommon
+    for folder, prefix in ((project, ""), ("RokCommon", "RokCommon/")):
+        base = os.path.join(REPO_ROOT, folder)
+        for root, dirs, files in os.walk(base):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            for name in sorted(files):
+                if name in SKIP_FILES or name.endswith(SKIP_SUFFIXES):
+                    continue
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, base).replace(os.sep, "/")
+                if prefix + rel not in SKIP_PATHS:
+                    yield path, prefix + rel
+
+
+def _deflate(raw):
+    # Raw deflate (no zlib header), what the device's DeflateIO(RAW) reads
+    c = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return c.compress(raw) + c.flush()
+
+
+def _mpy_files(project):
+    # Compile, then (build path, device path) of the /mpy tree
+    import build_mpy
+
+    out_dir, _count = build_mpy.build(project)
+    for root, _dirs, files in os.walk(out_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, out_dir).replace(os.sep, "/")
+            yield path, f"{build_mpy.MPY_DIR}/{rel}"
+
+
+def build(project, out_path, compress=True, mpy=False):
+    """Write the bundle -> (file count, raw bytes, bundle bytes)"""
+    index = []
+    blobs = []
+    raw_total = 0
+    files = list(deployment_files(project))
+    if mpy:
+        files.extend(_mpy_files(project))
+    for path, device_path in files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        entry = {
+            "path": device_path,
+            "size": len(raw),
+            "sha256": hashlib.sha256(raw).hexdigest(),
+        }
+        stored = raw
+        if compress and raw:
+            packed = _deflate(raw)
+            if len(packed) < len(raw):
+                stored = packed
+                entry["deflate"] = 1
+        entry["stored"] = len(stored)
+        index.append(entry)
+        blobs.append(stored)
+        raw_total += len(raw)
+
+    header = json.dumps(index, separators=(",", ":")).encode()
+    with open(out_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    return len(index), raw_total, os.path.getsize(out_path)
+
+
+def main(argv):
+    args = [a for a in argv if not a.startswith("-")]
+    if not args or args[0] not in PROJECTS:
+        print(__doc__)
+        return 1
+    project = args[0]
+    out_path = project + BUNDLE_EXT
+    if "-o" in argv:
+        out_path = argv[argv.index("-o") + 1]
+    count, raw_total, size = build(
+        project, out_path, "--no-compress" not in argv, "--mpy" in argv
+    )
+    print(f"{out_path}: {count} files, {raw_total} -> {size} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
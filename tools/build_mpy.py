@@ -0,0 +1,93 @@
+"""
+Cross-compile a device deployment to .mpy bytecode (run on the host)
+
+Compiles every module of a project and RokCommon with mpy-cross into
+build/<project>/mpy/, mirroring the device layout. Uploaded as /mpy next to
+the sources, it lets the device import bytecode instead of compiling the
+.py files at every boot. boot.py puts /mpy first on sys.path only when the
+firmware's bytecode version matches the mpy_version stamp written here, so
+a firmware update falls back to the sources rather than failing to import.
+main.py and boot.py always run from source.
+
+mpy-cross must match the firmware's MicroPython version:
+    pip install mpy-cross==1.27.0
+
+Usage:
+    python tools/build_mpy.py RokVehicle    # -> build/RokVehicle/mpy/
+    python tools/build_mpy.py RokVision
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+from build_bundle import PROJECTS, REPO_ROOT, deployment_files
+
+# Must match boot.py and RokCommon/ota/ota_transaction.py
+MPY_DIR = "mpy"
+MPY_VERSION_FILE = "mpy_version"
+
+# Run by the MicroPython firmware itself, which only looks for .py
+SOURCE_ONLY = ("main.py", "boot.py")
+
+MPY_CROSS = os.environ.get("MPY_CROSS", "").split() or [
+    sys.executable,
+    "-m",
+    "mpy_cross",
+]
+
+# Target of @micropython.viper/native code (both boards are ESP32-S3)
+MPY_ARCH = os.environ.get("MPY_ARCH", "xtensawin")
+
+
+def _mpy_header(mpy_path):
+    # (bytecode version, feature flags) from the .mpy header. Flags (arch and
+    # sub-version) are only set in files holding native code.
+    with open(mpy_path, "rb") as f:
+        header = f.read(4)
+    if header[:1] != b"M":
+        raise ValueError(f"{mpy_path}: not an .mpy file")
+    return header[1], header[2]
+
+
+def build(project):
+    """Compile into build/<project>/mpy/ -> (output folder, module count)"""
+    out_dir = os.path.join(REPO_ROOT, "build", project, MPY_DIR)
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)  # Never ship bytecode of deleted modules
+    count = 0
+    version = None
+    flags = 0
+    for path, device_path in deployment_files(project):
+        if not device_path.endswith(".py") or device_path in SOURCE_ONLY:
+            continue
+        out_path = os.path.join(out_dir, device_path[:-3] + ".mpy")
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        # -s: tracebacks name the device path
+        subprocess.run(
+            MPY_CROSS
+            + ["-march=" + MPY_ARCH, "-s", device_path, "-o", out_path, path],
+            check=True,
+        )
+        version, file_flags = _mpy_header(out_path)
+        flags = flags or file_flags
+        count += 1
+    if version:
+        # "<version>[.<flags>]", compared by boot.py with sys.implementation._mpy
+        with open(os.path.join(out_dir, MPY_VERSION_FILE), "w") as f:
+            f.write(f"{version}.{flags}" if flags else str(version))
+    return out_dir, count
+
+
+def main(argv):
+    if not argv or argv[0] not in PROJECTS:
+        print(__doc__)
+        return 1
+    out_dir, count = build(argv[0])
+    print(f"{os.path.relpath(out_dir, REPO_ROOT)}: {count} modules compiled")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))